@@ -62,6 +62,7 @@ document.addEventListener("DOMContentLoaded", () => {
       streamers_empty_title: "Нет данных",
       streamers_empty_desc: "Отслеживаемых стримеров пока нет",
       followers_word: "подписчиков",
+      live_badge: "В эфире",
       show_all: "Показать все →",
       prizes_label: "Мои призы",
       prizes_empty_title: "Нет призов",
@@ -108,6 +109,7 @@ document.addEventListener("DOMContentLoaded", () => {
       streamers_empty_title: "No data",
       streamers_empty_desc: "You have no followed streamers yet",
       followers_word: "followers",
+      live_badge: "LIVE",
       show_all: "Show all →",
       prizes_label: "My prizes",
       prizes_empty_title: "No prizes",
@@ -214,24 +216,10 @@ document.addEventListener("DOMContentLoaded", () => {
   }
 
   // --- Steam link ---
-  const loadSteam = async () => {
+  const loadSteam = () => {
     const local = localStorage.getItem(STEAM_KEY);
     if (local) {
       steamLink.value = local;
-      return;
-    }
-    try {
-      const userId = localStorage.getItem(USER_ID_KEY);
-      const resp = await fetch(userId ? `${BACKEND_URL}/steam/link?user_id=${userId}` : `${BACKEND_URL}/steam/link`);
-      if (resp.ok) {
-        const data = await resp.json();
-        if (data.steamTradeLink) {
-          steamLink.value = data.steamTradeLink;
-          localStorage.setItem(STEAM_KEY, data.steamTradeLink);
-        }
-      }
-    } catch (e) {
-      console.warn("Не удалось загрузить steam link", e);
     }
   };
   const persistSteam = async (value) => {
@@ -384,7 +372,7 @@ document.addEventListener("DOMContentLoaded", () => {
         <div class="streamer-meta">
           <img src="${item.avatar || "https://i.pravatar.cc/48?img=55"}" alt="${item.display_name || item.login}">
           <div>
-            <div class="title">${item.display_name || item.login}</div>
+            <div class="title">${item.display_name || item.login}${item.live ? ` <span class="badge badge-danger">${t("live_badge")}</span>` : ""}</div>
             <div class="muted">${item.platform} · ${item.followers ?? 0} ${t("followers_word")}</div>
           </div>
         </div>
@@ -394,26 +382,40 @@ document.addEventListener("DOMContentLoaded", () => {
     });
   };
 
-  const loadFollows = async () => {
+  // Follows from the last /me response; re-rendered locally after connect/disconnect.
+  let serverFollows = [];
+  const loadFollows = () => {
+    const fallback = localFollowFallback();
+    const merged = [...serverFollows];
+    const keys = new Set(merged.map((x) => `${x.platform}:${x.login}`));
+    fallback.forEach((x) => {
+      const k = `${x.platform}:${x.login}`;
+      if (!keys.has(k)) merged.push(x);
+    });
+    renderFollowList(merged.length ? merged : fallback);
+  };
+
+  // --- Profile bootstrap: one /me round trip for steam link + follows ---
+  const loadProfile = async () => {
     try {
       const userId = localStorage.getItem(USER_ID_KEY);
-      const url = userId ? `${BACKEND_URL}/streamers/following?user_id=${userId}` : `${BACKEND_URL}/streamers/following`;
-      const resp = await fetch(url);
-      const base = resp.ok ? await resp.json() : [];
-      const fallback = localFollowFallback();
-      const merged = [...(Array.isArray(base) ? base : [])];
-      const keys = new Set(merged.map((x) => `${x.platform}:${x.login}`));
-      fallback.forEach((x) => {
-        const k = `${x.platform}:${x.login}`;
-        if (!keys.has(k)) merged.push(x);
-      });
-      renderFollowList(merged.length ? merged : fallback);
+      const resp = await fetch(userId ? `${BACKEND_URL}/me?user_id=${userId}` : `${BACKEND_URL}/me`);
+      if (resp.ok) {
+        const me = await resp.json();
+        if (!localStorage.getItem(STEAM_KEY) && me.steamTradeLink) {
+          steamLink.value = me.steamTradeLink;
+          localStorage.setItem(STEAM_KEY, me.steamTradeLink);
+        }
+        serverFollows = Array.isArray(me.follows) ? me.follows : [];
+      }
     } catch (e) {
-      console.warn("Не удалось загрузить отслеживаемых стримеров", e);
-      renderFollowList(localFollowFallback());
+      console.warn("Не удалось загрузить профиль", e);
     }
+    loadFollows();
+    updateParticipation();
   };
   loadFollows();
+  loadProfile();
 
   // --- Settings panel open/close ---
   const showSettings = () => {
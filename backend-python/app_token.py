@@ -0,0 +1,112 @@
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+from http_clients import ProviderClients
+from singleflight import SingleFlight
+
+TWITCH_TOKEN_URL = os.environ.get("TWITCH_TOKEN_URL", "https://id.twitch.tv/oauth2/token")
+APP_TOKEN_REFRESH_MARGIN = float(os.environ.get("APP_TOKEN_REFRESH_MARGIN", "600"))
+APP_TOKEN_RETRY = float(os.environ.get("APP_TOKEN_RETRY", "30"))
+
+
+class AppTokenError(Exception):
+    def __init__(self, provider: str, status_code: int, detail: str):
+        super().__init__(f"{provider} app token {status_code}: {detail}")
+        self.status_code = status_code
+
+
+class AppTokenManager:
+    """Client-credentials app access token for server-to-server lookups.
+
+    The token lives in memory and `run()` replaces it `refresh_margin` seconds
+    before it expires, so `get()` normally returns without I/O. When a fetch
+    is needed (startup, failure, `invalidate()` after a 401), concurrent
+    callers share one in-flight request.
+    """
+
+    def __init__(
+        self,
+        clients: ProviderClients,
+        provider: str,
+        token_url: Optional[str],
+        client_id: Optional[str],
+        client_secret: Optional[str],
+        refresh_margin: float = APP_TOKEN_REFRESH_MARGIN,
+        retry_delay: float = APP_TOKEN_RETRY,
+    ):
+        self.clients = clients
+        self.provider = provider
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_margin = refresh_margin
+        self.retry_delay = retry_delay
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._flights = SingleFlight()
+        self.fetches = 0
+        self.failures = 0
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.token_url and self.client_id and self.client_secret)
+
+    def _fresh(self) -> bool:
+        return self._token is not None and time.monotonic() < self._refresh_at
+
+    async def get(self) -> str:
+        if self._fresh():
+            return self._token
+        return await self.fetch()
+
+    async def fetch(self) -> str:
+        return await self._flights.do(self.provider, self._fetch)
+
+    async def _fetch(self) -> str:
+        if not self.configured:
+            raise AppTokenError(self.provider, 0, "client id/secret not configured")
+        self.fetches += 1
+        resp = await self.clients.get(self.provider).post(
+            self.token_url,
+            data={
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "grant_type": "client_credentials",
+            },
+        )
+        if resp.status_code != 200:
+            self.failures += 1
+            raise AppTokenError(self.provider, resp.status_code, resp.text[:200])
+        payload = resp.json()
+        lifetime = float(payload.get("expires_in") or 3600)
+        now = time.monotonic()
+        self._token = payload["access_token"]
+        self._expires_at = now + lifetime
+        # Short-lived tokens still get half their lifetime before an early refresh.
+        self._refresh_at = now + max(lifetime - self.refresh_margin, lifetime / 2)
+        return self._token
+
+    def invalidate(self, token: str) -> None:
+        """Drop `token` after the provider rejected it; the next `get()` refetches."""
+        if self._token == token:
+            self._token = None
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.fetch()
+            except Exception:
+                await asyncio.sleep(self.retry_delay)
+                continue
+            await asyncio.sleep(max(self._refresh_at - time.monotonic(), self.retry_delay))
+
+    def stats(self) -> Dict:
+        return {
+            "valid": self._fresh(),
+            "expiresIn": max(int(self._expires_at - time.monotonic()), 0) if self._token else 0,
+            "fetches": self.fetches,
+            "failures": self.failures,
+        }
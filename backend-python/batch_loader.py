@@ -0,0 +1,120 @@
+import asyncio
+import os
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Iterable, Iterator, List, Optional, Set, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# Keys requested within this many seconds go out in one batch; 0 means "this event-loop tick".
+BATCH_LOADER_DELAY = float(os.environ.get("BATCH_LOADER_DELAY", "0.002"))
+
+# loader name -> counters, summed over every loader created under that name.
+loader_stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"loads": 0, "cached": 0, "batches": 0})
+
+_scope: ContextVar[Optional[Dict[Hashable, "BatchLoader"]]] = ContextVar("loader_scope", default=None)
+
+
+@contextmanager
+def loader_scope() -> Iterator[None]:
+    """Share loaders (and their result caches) between all lookups made in this context."""
+    token = _scope.set({})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def scoped_loader(key: Hashable, factory: Callable[[], "BatchLoader"]) -> "BatchLoader":
+    """The loader for `key` in the current scope; a fresh one when no scope is active."""
+    scope = _scope.get()
+    if scope is None:
+        return factory()
+    loader = scope.get(key)
+    if loader is None:
+        loader = scope[key] = factory()
+    return loader
+
+
+class BatchLoader(Generic[K, V]):
+    """DataLoader-style batching of single-key lookups.
+
+    `load(key)` queues the key and returns a future result; keys queued within
+    `delay` seconds (or once `max_batch` are waiting) go to `batch_fn` in one
+    call, which returns {key: value} for the keys it found. Each key is
+    fetched at most once per loader, so a loader shared through
+    `loader_scope()` also caches results for that scope. Failed keys are
+    dropped from the cache so a later `load` retries them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]],
+        max_batch: int,
+        concurrency: int = 4,
+        delay: float = BATCH_LOADER_DELAY,
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, max_batch)
+        self.delay = delay
+        self._sem = asyncio.Semaphore(concurrency)
+        self._cache: Dict[K, asyncio.Future] = {}
+        self._queue: List[K] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+        self._stats = loader_stats[name]
+
+    async def load(self, key: K) -> Optional[V]:
+        self._stats["loads"] += 1
+        future = self._cache.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._cache[key] = loop.create_future()
+            self._queue.append(key)
+            if len(self._queue) >= self.max_batch:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.delay, self._dispatch)
+        else:
+            self._stats["cached"] += 1
+        # A cancelled caller must not cancel the result other callers are waiting for.
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[K]) -> Dict[K, V]:
+        """Found values for `keys`; keys the provider did not return are left out."""
+        keys = list(dict.fromkeys(keys))
+        values = await asyncio.gather(*(self.load(key) for key in keys))
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue:
+            batch, self._queue = self._queue[: self.max_batch], self._queue[self.max_batch :]
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, keys: List[K]) -> None:
+        self._stats["batches"] += 1
+        try:
+            async with self._sem:
+                found = await self.batch_fn(keys)
+        except Exception as exc:
+            for key in keys:
+                future = self._cache.pop(key)
+                future.set_exception(exc)
+                # Mark it retrieved in case every caller has given up.
+                future.exception()
+            return
+        except BaseException:
+            for key in keys:
+                self._cache.pop(key).cancel()
+            raise
+        for key in keys:
+            self._cache[key].set_result(found.get(key))
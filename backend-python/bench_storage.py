@@ -0,0 +1,91 @@
+"""Read/write throughput of the SQLite storage profile.
+
+    python bench_storage.py [--threads 16] [--seconds 5] [--users 200]
+
+Runs the same mixed workload (login upserts + follow reads) against a
+temporary database with SQLite defaults (`off`) and with the production
+profile, and prints ops/sec for each.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, select
+
+import store
+from db import SQLiteProfile, build_engine
+from models import Follow
+
+
+def _follows(n: int):
+    return [{"login": f"streamer{i}", "display_name": f"Streamer {i}", "followers": i} for i in range(n)]
+
+
+def run(profile: SQLiteProfile | None, threads: int, seconds: float, users: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}", profile)
+        SQLModel.metadata.create_all(engine)
+        # Writes take the lock up front, as db.write_engine does in the API.
+        write_engine = engine.execution_options(sqlite_immediate=True)
+
+        def save(uid: int, token: str, follows: list) -> None:
+            with Session(write_engine) as session, session.begin():
+                store.save_login(session, "twitch", str(uid), {"display_name": f"u{uid}"}, {"access_token": token}, follows)
+
+        for uid in range(users):
+            save(uid, "x", _follows(20))
+
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def worker(seed: int) -> None:
+            rnd = random.Random(seed)
+            reads = writes = errors = 0
+            while time.perf_counter() < deadline:
+                uid = rnd.randrange(users)
+                try:
+                    if rnd.random() < 0.2:
+                        save(uid, str(rnd.random()), _follows(rnd.randint(18, 22)))
+                        writes += 1
+                    else:
+                        with Session(engine) as session:
+                            session.exec(select(Follow).where(Follow.user_id == uid + 1)).all()
+                        reads += 1
+                except OperationalError:
+                    errors += 1
+            with lock:
+                counts["reads"] += reads
+                counts["writes"] += writes
+                counts["errors"] += errors
+
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        engine.dispose()
+        return {k: v / seconds if k != "errors" else v for k, v in counts.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    for name, profile in (("off", None), ("production", SQLiteProfile())):
+        result = run(profile, args.threads, args.seconds, args.users)
+        print(
+            f"{name:>10}: {result['reads']:8.0f} reads/s  {result['writes']:7.0f} writes/s  "
+            f"{result['errors']} lock errors"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable
+
+import httpx
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of sending a request while the provider's circuit is open.
+
+    It is an `httpx.TransportError`, so code that already treats network
+    failures as "provider unavailable" handles it without changes.
+    """
+
+    def __init__(self, provider: str, retry_in: float, request: httpx.Request | None = None):
+        super().__init__(f"{provider} circuit open, retry in {retry_in:.0f}s", request=request)
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+@dataclass
+class BreakerSettings:
+    window: int = 20
+    min_calls: int = 10
+    failure_rate: float = 0.5
+    slow_call: float = 5.0
+    open_seconds: float = 30.0
+    half_open_probes: int = 1
+
+    @classmethod
+    def from_env(cls, provider: str) -> "BreakerSettings":
+        prefix = f"CIRCUIT_{provider.upper()}"
+        return cls(
+            window=int(os.environ.get(f"{prefix}_WINDOW", cls.window)),
+            min_calls=int(os.environ.get(f"{prefix}_MIN_CALLS", cls.min_calls)),
+            failure_rate=float(os.environ.get(f"{prefix}_FAILURE_RATE", cls.failure_rate)),
+            slow_call=float(os.environ.get(f"{prefix}_SLOW_CALL", cls.slow_call)),
+            open_seconds=float(os.environ.get(f"{prefix}_OPEN_SECONDS", cls.open_seconds)),
+            half_open_probes=int(os.environ.get(f"{prefix}_HALF_OPEN_PROBES", cls.half_open_probes)),
+        )
+
+
+class CircuitBreaker:
+    """Failure-rate and latency circuit breaker for one provider.
+
+    The last `window` calls are kept as pass/fail; transport errors, 5xx
+    responses and calls slower than `slow_call` seconds count as failures.
+    Once at least `min_calls` are recorded and the failure share reaches
+    `failure_rate`, the circuit opens and requests fail immediately for
+    `open_seconds`. It then goes half-open and lets `half_open_probes`
+    requests through: if they all succeed it closes, and one failure opens
+    it again.
+    """
+
+    def __init__(self, provider: str, settings: BreakerSettings):
+        self.provider = provider
+        self.settings = settings
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._outcomes: Deque[bool] = deque(maxlen=settings.window)
+        self._probes = 0
+        self._probe_successes = 0
+        self.rejected = 0
+        self.opened = 0
+        self.slow = 0
+
+    def before(self, request: httpx.Request) -> None:
+        if self.state == OPEN:
+            retry_in = self.opened_at + self.settings.open_seconds - time.monotonic()
+            if retry_in > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.provider, retry_in, request)
+            self.state = HALF_OPEN
+            self._probes = 0
+            self._probe_successes = 0
+        if self.state == HALF_OPEN:
+            if self._probes >= self.settings.half_open_probes:
+                self.rejected += 1
+                raise CircuitOpenError(self.provider, self.settings.open_seconds, request)
+            self._probes += 1
+
+    def record(self, ok: bool, elapsed: float) -> None:
+        if ok and elapsed > self.settings.slow_call:
+            self.slow += 1
+            ok = False
+        if self.state == HALF_OPEN:
+            if not ok:
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.settings.half_open_probes:
+                self.state = CLOSED
+                self._outcomes.clear()
+            return
+        if self.state == OPEN:
+            # A request sent before the circuit opened; it does not change the verdict.
+            return
+        self._outcomes.append(ok)
+        calls = len(self._outcomes)
+        if calls >= self.settings.min_calls and self._outcomes.count(False) / calls >= self.settings.failure_rate:
+            self._open()
+
+    def release(self) -> None:
+        """A half-open probe was cancelled without an outcome; free its slot."""
+        if self.state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.opened += 1
+        self._outcomes.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "failureRate": round(self._outcomes.count(False) / len(self._outcomes), 3) if self._outcomes else 0.0,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "slowCalls": self.slow,
+        }
+
+
+class BreakerTransport(httpx.AsyncBaseTransport):
+    """Wraps a provider client's transport with its circuit breaker.
+
+    Sitting at the transport level means timeouts and connection errors are
+    recorded too, not only responses.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, breaker: CircuitBreaker):
+        self.transport = transport
+        self.breaker = breaker
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.breaker.before(request)
+        started = time.monotonic()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception:
+            self.breaker.record(False, time.monotonic() - started)
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record(response.status_code < 500, time.monotonic() - started)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class CircuitBreakers:
+    """One CircuitBreaker per provider."""
+
+    def __init__(self, providers: Iterable[str]):
+        self.breakers = {p: CircuitBreaker(p, BreakerSettings.from_env(p)) for p in providers}
+
+    def get(self, provider: str) -> CircuitBreaker:
+        return self.breakers[provider]
+
+    def is_open(self, provider: str) -> bool:
+        breaker = self.breakers.get(provider)
+        return breaker is not None and breaker.state != CLOSED
+
+    def stats(self) -> Dict[str, Dict]:
+        return {p: b.stats() for p, b in self.breakers.items()}
@@ -0,0 +1,163 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, TypeVar
+
+from sqlalchemy import Engine, event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, SQLModel, create_engine
+
+# Registers the tables on SQLModel.metadata, so init_db creates all of them.
+import models  # noqa: F401
+from migrations import run_migrations
+
+DB_URL = os.environ.get("DB_URL", "sqlite:///./db.sqlite3")
+DB_EXECUTOR_WORKERS = int(os.environ.get("DB_EXECUTOR_WORKERS", "4"))
+
+
+@dataclass
+class SQLiteProfile:
+    """PRAGMAs applied to every new SQLite connection.
+
+    The defaults are the production profile: WAL so readers never block the
+    writer, NORMAL sync (durable in WAL, no fsync per commit), mmap'd reads
+    and a 64 MiB page cache. `DB_SQLITE_PROFILE=off` keeps SQLite defaults.
+    """
+
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size: int = -64 * 1024
+    busy_timeout: int = 5000
+    temp_store: str = "MEMORY"
+
+    @classmethod
+    def from_env(cls) -> "SQLiteProfile | None":
+        if os.environ.get("DB_SQLITE_PROFILE", "production").lower() == "off":
+            return None
+        return cls(
+            journal_mode=os.environ.get("SQLITE_JOURNAL_MODE", cls.journal_mode),
+            synchronous=os.environ.get("SQLITE_SYNCHRONOUS", cls.synchronous),
+            mmap_size=int(os.environ.get("SQLITE_MMAP_SIZE", cls.mmap_size)),
+            cache_size=int(os.environ.get("SQLITE_CACHE_SIZE", cls.cache_size)),
+            busy_timeout=int(os.environ.get("SQLITE_BUSY_TIMEOUT", cls.busy_timeout)),
+            temp_store=os.environ.get("SQLITE_TEMP_STORE", cls.temp_store),
+        )
+
+    def pragmas(self) -> Dict[str, Any]:
+        # busy_timeout first: switching a new file to WAL needs the lock too.
+        return {
+            "busy_timeout": self.busy_timeout,
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            "mmap_size": self.mmap_size,
+            "cache_size": self.cache_size,
+            "temp_store": self.temp_store,
+        }
+
+
+def pool_options(url: str) -> Dict[str, Any]:
+    # In-memory SQLite uses a per-thread/static pool; sizing does not apply.
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") == "sqlite:"):
+        return {}
+    return {
+        # Sized for Starlette's 40-thread pool plus the DB executor.
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.environ.get("DB_POOL_MAX_OVERFLOW", "40")),
+        "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "-1")),
+    }
+
+
+def build_engine(url: str, profile: SQLiteProfile | None = None) -> Engine:
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_pre_ping=True, **pool_options(url))
+
+    built = create_engine(url, connect_args={"check_same_thread": False}, **pool_options(url))
+
+    @event.listens_for(built, "connect")
+    def _on_connect(dbapi_conn, _record):
+        # Let SQLAlchemy, not pysqlite, issue BEGIN so SAVEPOINTs and
+        # transaction boundaries behave as written.
+        dbapi_conn.isolation_level = None
+        if profile is not None:
+            cursor = dbapi_conn.cursor()
+            for name, value in profile.pragmas().items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    @event.listens_for(built, "begin")
+    def _on_begin(conn):
+        # Write transactions take the lock up front: a deferred transaction
+        # that reads first cannot upgrade while another writer holds it and
+        # fails with "database is locked" instead of waiting busy_timeout.
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if conn.get_execution_options().get("sqlite_immediate") else "BEGIN")
+
+    return built
+
+
+engine = build_engine(DB_URL, SQLiteProfile.from_env())
+# Same pool; sessions bound here start with BEGIN IMMEDIATE on SQLite.
+write_engine = engine.execution_options(sqlite_immediate=True)
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Dedicated pool for blocking DB work issued from async handlers.
+
+    Kept separate from Starlette's threadpool so slow commits/fsyncs only
+    queue behind other DB work, never behind (or in front of) sync endpoints.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+    return _executor
+
+
+def shutdown_db_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), partial(fn, *args, **kwargs))
+
+
+def get_session():
+    with Session(engine) as session:
+        yield session
+
+
+def read(fn: Callable[..., T], *args: Any) -> T:
+    """Run `fn(session, *args)` in a short-lived read session (blocking)."""
+    with Session(engine) as session:
+        return fn(session, *args)
+
+
+async def read_async(fn: Callable[..., T], *args: Any) -> T:
+    return await run_db(read, fn, *args)
+
+
+def upsert(table):
+    """Dialect `INSERT` that supports `.on_conflict_do_update()` and `.returning()`."""
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def init_db():
+    # Workers start together: BEGIN IMMEDIATE lets one create/migrate the schema
+    # while the others wait, and they re-check it inside the lock, so they find
+    # the tables and the current user_version instead of "database is locked".
+    with write_engine.begin() as conn:
+        fresh = not inspect(conn).has_table("user")
+        SQLModel.metadata.create_all(conn)
+        run_migrations(conn, fresh)
@@ -0,0 +1,289 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+PROVIDER_CACHE_ENTRIES = int(os.environ.get("PROVIDER_CACHE_ENTRIES", "2048"))
+# Optional second tier; unset keeps the cache in memory only.
+PROVIDER_CACHE_DIR = os.environ.get("PROVIDER_CACHE_DIR")
+PROVIDER_CACHE_DISK_MB = float(os.environ.get("PROVIDER_CACHE_DISK_MB", "64"))
+
+# Response headers a 304 may update on the stored entry (RFC 9111 4.3.4).
+_REVALIDATED_HEADERS = ("cache-control", "expires", "date", "etag", "last-modified", "age", "vary")
+
+
+def _directives(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness(headers: httpx.Headers, now: float) -> Optional[float]:
+    """Seconds the response stays fresh, 0 when it must be revalidated, None when it must not be stored."""
+    cc = _directives(headers.get("Cache-Control"))
+    if "no-store" in cc:
+        return None
+    if "no-cache" in cc:
+        return 0.0
+    if cc.get("max-age") is not None:
+        try:
+            return max(float(cc["max-age"]) - float(headers.get("Age") or 0), 0.0)
+        except ValueError:
+            return 0.0
+    expires = _http_date(headers.get("Expires"))
+    if expires is not None:
+        # Relative to the server's clock when it sent a Date header.
+        return max(expires - (_http_date(headers.get("Date")) or now), 0.0)
+    return 0.0
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+    expires_at: float
+    vary: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        headers = httpx.Headers(self.headers)
+        found = {}
+        if headers.get("ETag"):
+            found["If-None-Match"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            found["If-Modified-Since"] = headers["Last-Modified"]
+        return found
+
+    def matches(self, request: httpx.Request) -> bool:
+        return all(request.headers.get(name, "") == value for name, value in self.vary.items())
+
+    def response(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(self.status_code, headers=self.headers, content=self.body, request=request)
+
+    def dumps(self) -> bytes:
+        meta = {"status": self.status_code, "headers": self.headers, "expires_at": self.expires_at, "vary": self.vary}
+        return json.dumps(meta).encode() + b"\n" + self.body
+
+    @classmethod
+    def loads(cls, data: bytes) -> "CachedResponse":
+        meta, _, body = data.partition(b"\n")
+        fields = json.loads(meta)
+        return cls(
+            status_code=fields["status"],
+            headers=[tuple(h) for h in fields["headers"]],
+            body=body,
+            expires_at=fields["expires_at"],
+            vary=fields["vary"],
+        )
+
+
+class DiskTier:
+    """Size-capped directory of cached responses, one file per key, oldest evicted first."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        for leftover in self.path.glob("*.tmp"):
+            leftover.unlink(missing_ok=True)
+        for entry in sorted(self.path.glob("*.entry"), key=lambda p: p.stat().st_mtime):
+            self._sizes[entry.stem] = entry.stat().st_size
+        self.bytes = sum(self._sizes.values())
+
+    def get(self, name: str) -> Optional[CachedResponse]:
+        try:
+            data = (self.path / f"{name}.entry").read_bytes()
+        except OSError:
+            return None
+        with self._lock:
+            if name in self._sizes:
+                self._sizes.move_to_end(name)
+        try:
+            return CachedResponse.loads(data)
+        except (ValueError, KeyError):
+            return None
+
+    def put(self, name: str, entry: CachedResponse) -> None:
+        data = entry.dumps()
+        if len(data) > self.max_bytes:
+            return
+        # One temp file per write so concurrent stores of a key never share it; mkstemp creates it 0600,
+        # which keeps provider responses (they can carry user data) private.
+        fd, tmp = tempfile.mkstemp(dir=self.path, prefix=f"{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.path / f"{name}.entry")
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self.bytes += len(data) - self._sizes.pop(name, 0)
+            self._sizes[name] = len(data)
+            while self.bytes > self.max_bytes and self._sizes:
+                old, size = self._sizes.popitem(last=False)
+                self.bytes -= size
+                (self.path / f"{old}.entry").unlink(missing_ok=True)
+
+
+class ResponseCache:
+    """Private HTTP cache for provider GETs: in-memory LRU, optionally backed by a `DiskTier`."""
+
+    def __init__(self, max_entries: int = PROVIDER_CACHE_ENTRIES, disk: Optional[DiskTier] = None):
+        self.max_entries = max_entries
+        self.disk = disk
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stored = 0
+        self.disk_errors = 0
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        disk = DiskTier(PROVIDER_CACHE_DIR, int(PROVIDER_CACHE_DISK_MB * 1024 * 1024)) if PROVIDER_CACHE_DIR else None
+        return cls(PROVIDER_CACHE_ENTRIES, disk)
+
+    @staticmethod
+    def key(request: httpx.Request) -> str:
+        # Credential scope: responses fetched with one token are never served to another.
+        scope = request.headers.get("Authorization", "")
+        return hashlib.sha256(f"{scope}\n{request.url}".encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        if self.disk is None:
+            return None
+        try:
+            entry = await asyncio.to_thread(self.disk.get, key)
+        except OSError:
+            # The disk tier is best effort: any filesystem error is a miss, never a failed request.
+            self.disk_errors += 1
+            return None
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    async def put(self, key: str, entry: CachedResponse) -> None:
+        self.stored += 1
+        self._remember(key, entry)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.put, key, entry)
+            except OSError:
+                self.disk_errors += 1
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "stored": self.stored,
+            "entries": len(self._entries),
+            "diskBytes": self.disk.bytes if self.disk else 0,
+            "diskErrors": self.disk_errors,
+        }
+
+
+class CacheTransport(httpx.AsyncBaseTransport):
+    """Serves provider GETs from a `ResponseCache` following `Cache-Control`/`Expires`.
+
+    Fresh entries are answered locally without touching the rate limiter or
+    the network. Stale entries with an `ETag`/`Last-Modified` are revalidated
+    with `If-None-Match`/`If-Modified-Since`; a 304 refreshes the entry and
+    returns the stored body. Only 200 responses are stored, and `Vary: *`
+    or `no-store` ones never are.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: ResponseCache):
+        self.transport = transport
+        self.cache = cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET":
+            return await self.transport.handle_async_request(request)
+        key = self.cache.key(request)
+        entry = await self.cache.get(key)
+        if entry is not None and not entry.matches(request):
+            entry = None
+        now = time.time()
+        if entry is not None and entry.expires_at > now:
+            self.cache.hits += 1
+            return entry.response(request)
+
+        validators = entry.validators if entry is not None else {}
+        if validators:
+            request.headers.update(validators)
+        response = await self.transport.handle_async_request(request)
+
+        if response.status_code == 304 and entry is not None:
+            await response.aclose()
+            self.cache.revalidated += 1
+            headers = httpx.Headers(entry.headers)
+            for name in _REVALIDATED_HEADERS:
+                if name in response.headers:
+                    headers[name] = response.headers[name]
+            fresh = freshness(headers, now)
+            refreshed = CachedResponse(
+                entry.status_code, headers.multi_items(), entry.body, now + (fresh or 0.0), entry.vary
+            )
+            await self.cache.put(key, refreshed)
+            return refreshed.response(request)
+
+        self.cache.misses += 1
+        if response.status_code != 200:
+            return response
+        fresh = freshness(response.headers, now)
+        vary = [v.strip().lower() for v in response.headers.get("Vary", "").split(",") if v.strip()]
+        if fresh is None or "*" in vary:
+            return response
+        # Keep the raw (still content-encoded) bytes so the client decodes them as usual.
+        body = b"".join([chunk async for chunk in response.stream])
+        await response.aclose()
+        stored = CachedResponse(
+            response.status_code,
+            response.headers.multi_items(),
+            body,
+            now + fresh,
+            {name: request.headers.get(name, "") for name in vary},
+        )
+        if fresh > 0 or stored.validators:
+            await self.cache.put(key, stored)
+        return stored.response(request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -0,0 +1,124 @@
+import os
+from dataclasses import dataclass
+from typing import Dict
+
+import httpx
+
+from circuit_breaker import BreakerTransport, CircuitBreakers
+from http_cache import CacheTransport, ResponseCache
+from rate_limit import RateLimiter, RateLimitTransport
+
+PROVIDERS = ("twitch", "kick")
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@dataclass
+class HttpClientSettings:
+    timeout: float = 10.0
+    connect_timeout: float = 5.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+
+    @classmethod
+    def from_env(cls) -> "HttpClientSettings":
+        return cls(
+            timeout=_env_float("HTTP_TIMEOUT", cls.timeout),
+            connect_timeout=_env_float("HTTP_CONNECT_TIMEOUT", cls.connect_timeout),
+            max_connections=_env_int("HTTP_MAX_CONNECTIONS", cls.max_connections),
+            max_keepalive_connections=_env_int("HTTP_MAX_KEEPALIVE", cls.max_keepalive_connections),
+            keepalive_expiry=_env_float("HTTP_KEEPALIVE_EXPIRY", cls.keepalive_expiry),
+            http2=_env_bool("HTTP_HTTP2"),
+        )
+
+
+class ProviderClients:
+    """One pooled keep-alive AsyncClient per provider, shared by all requests.
+
+    Clients are opened in the app lifespan and closed on shutdown; `get` also
+    opens lazily so helpers keep working when no lifespan is running. The
+    transport is layered, outermost first: `cache` answers fresh GETs and
+    revalidates stale ones, `limiter` budgets what reaches the network, and
+    `breakers` fail fast while the provider's circuit is open. `transport`
+    replaces the network layer underneath (tests pass an `httpx.MockTransport`).
+    """
+
+    def __init__(
+        self,
+        settings: HttpClientSettings | None = None,
+        limiter: RateLimiter | None = None,
+        breakers: CircuitBreakers | None = None,
+        cache: ResponseCache | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.settings = settings or HttpClientSettings()
+        self.limiter = limiter
+        self.breakers = breakers
+        self.cache = cache
+        self.transport = transport
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def _build(self, provider: str) -> httpx.AsyncClient:
+        s = self.settings
+        transport: httpx.AsyncBaseTransport = self.transport or httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=s.max_connections,
+                max_keepalive_connections=s.max_keepalive_connections,
+                keepalive_expiry=s.keepalive_expiry,
+            ),
+            http2=s.http2 and _http2_available(),
+        )
+        if self.breakers is not None:
+            transport = BreakerTransport(transport, self.breakers.get(provider))
+        if self.limiter is not None and provider in self.limiter.limits:
+            transport = RateLimitTransport(transport, self.limiter, provider)
+        if self.cache is not None:
+            transport = CacheTransport(transport, self.cache)
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(s.timeout, connect=s.connect_timeout),
+            transport=transport,
+            headers={"User-Agent": f"kick-tg-rewards/{provider}"},
+        )
+
+    def start(self) -> None:
+        for provider in PROVIDERS:
+            self.get(provider)
+
+    def get(self, provider: str) -> httpx.AsyncClient:
+        if provider not in PROVIDERS:
+            raise KeyError(f"Unknown provider: {provider}")
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            client = self._build(provider)
+            self._clients[provider] = client
+        return client
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
@@ -0,0 +1,163 @@
+import asyncio
+import os
+from typing import Dict, List, Optional
+
+from batch_loader import BatchLoader, scoped_loader
+from http_clients import ProviderClients
+from singleflight import SingleFlight
+
+# Kick's public API has no followed-channels endpoint yet, so the follows URL
+# is opt-in; channel metadata comes from the documented channels endpoint.
+KICK_FOLLOWS_URL = os.environ.get("KICK_FOLLOWS_URL")
+KICK_CHANNELS_URL = os.environ.get("KICK_CHANNELS_URL", "https://api.kick.com/public/v1/channels")
+KICK_SYNC_CONCURRENCY = int(os.environ.get("KICK_SYNC_CONCURRENCY", "4"))
+KICK_FOLLOWS_PAGE_SIZE = int(os.environ.get("KICK_FOLLOWS_PAGE_SIZE", "100"))
+# Upper bound on follow pages per sync, in case the endpoint ignores `page`/`limit`.
+KICK_FOLLOWS_MAX_PAGES = int(os.environ.get("KICK_FOLLOWS_MAX_PAGES", "50"))
+KICK_CHANNELS_BATCH = 50
+
+
+class KickError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"Kick {status_code}: {detail}")
+        self.status_code = status_code
+
+
+def _items(payload) -> List[Dict]:
+    if isinstance(payload, list):
+        return payload
+    data = payload.get("data") if isinstance(payload, dict) else None
+    if isinstance(data, list):
+        return data
+    channels = payload.get("channels") if isinstance(payload, dict) else None
+    return channels if isinstance(channels, list) else []
+
+
+def _entry(item: Dict) -> Dict:
+    user = item.get("user") if isinstance(item.get("user"), dict) else {}
+    name = item.get("username") or item.get("user_username") or user.get("username") or item.get("name")
+    login = item.get("slug") or item.get("channel_slug") or (name or "").lower()
+    provider_id = item.get("broadcaster_user_id") or item.get("user_id") or user.get("id")
+    return {
+        "provider_id": str(provider_id) if provider_id else None,
+        "login": login,
+        "display_name": name,
+        "followers": item.get("followers_count"),
+        "avatar": item.get("profile_picture") or user.get("profile_pic"),
+    }
+
+
+class KickFollowSync:
+    """Builds a user's Kick follow list.
+
+    Follows are page-numbered, so up to `concurrency` pages are fetched at a
+    time until a short page marks the end, a window of pages adds no new
+    logins (the endpoint ignored `page`), or `max_pages` is reached. Channels are then resolved through
+    `KICK_CHANNELS_URL?slug=` in batches of 50 to fill broadcaster ids and any
+    metadata the follows payload lacks. Slug lookups go through a `BatchLoader`,
+    so inside a `loader_scope()` each channel is fetched once.
+    """
+
+    def __init__(
+        self,
+        clients: ProviderClients,
+        client_id: str,
+        follows_url: Optional[str] = KICK_FOLLOWS_URL,
+        channels_url: Optional[str] = KICK_CHANNELS_URL,
+        concurrency: int = KICK_SYNC_CONCURRENCY,
+        page_size: int = KICK_FOLLOWS_PAGE_SIZE,
+        max_pages: int = KICK_FOLLOWS_MAX_PAGES,
+        flights: Optional[SingleFlight] = None,
+    ):
+        self.clients = clients
+        self.client_id = client_id
+        self.follows_url = follows_url
+        self.channels_url = channels_url
+        self.concurrency = max(1, concurrency)
+        self.page_size = page_size
+        self.max_pages = max(1, max_pages)
+        self.flights = flights
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.follows_url)
+
+    async def _get(self, url: str, token: str, params: List[tuple]) -> List[Dict]:
+        if self.flights is None:
+            return await self._fetch(url, token, params)
+        return await self.flights.do(("kick", url, token, tuple(params)), self._fetch, url, token, params)
+
+    async def _fetch(self, url: str, token: str, params: List[tuple]) -> List[Dict]:
+        headers = {"Authorization": f"Bearer {token}", "Client-Id": self.client_id, "Accept": "application/json"}
+        resp = await self.clients.get("kick").get(url, params=params, headers=headers)
+        if resp.status_code != 200:
+            raise KickError(resp.status_code, resp.text[:200])
+        return _items(resp.json())
+
+    async def _page(self, number: int, token: str) -> List[Dict]:
+        return await self._get(self.follows_url or "", token, [("page", str(number)), ("limit", str(self.page_size))])
+
+    def _channels(self, token: str) -> BatchLoader:
+        """Channels by slug, 50 per call."""
+
+        async def load(slugs: List[str]) -> Dict[str, Dict]:
+            channels = await self._get(self.channels_url or "", token, [("slug", s) for s in slugs])
+            return {c.get("slug"): c for c in channels}
+
+        return scoped_loader(
+            ("kick", "channels", token),
+            lambda: BatchLoader("kick.channels", load, KICK_CHANNELS_BATCH, self.concurrency),
+        )
+
+    async def fetch_follows(self, token: str) -> List[Dict]:
+        entries: Dict[str, Dict] = {}
+        first = 1
+        done = False
+        while not done and first <= self.max_pages:
+            known = len(entries)
+            last = min(first + self.concurrency, self.max_pages + 1)
+            pages = await asyncio.gather(*(self._page(n, token) for n in range(first, last)))
+            for items in pages:
+                for item in items:
+                    entry = _entry(item)
+                    if entry["login"]:
+                        entries[entry["login"]] = entry
+                if len(items) < self.page_size:
+                    done = True
+                    break
+            done = done or len(entries) == known
+            first = last
+
+        if self.channels_url and entries:
+            for channel in (await self._channels(token).load_many(entries)).values():
+                info = _entry(channel)
+                entry = entries.get(info["login"])
+                if entry is None:
+                    continue
+                for key, value in info.items():
+                    if entry.get(key) is None:
+                        entry[key] = value
+        return list(entries.values())
+
+    async def fetch_channels(self, token: str, streamers: List[Dict]) -> List[Dict]:
+        """Current metadata for known streamers, looked up by slug in batches of 50."""
+        if not self.channels_url:
+            return []
+        channels = await self._channels(token).load_many(s["login"] for s in streamers)
+        return [_entry(channel) for channel in channels.values()]
+
+    async def fetch_streams(self, token: str, streamers: List[Dict]) -> Dict[str, Dict]:
+        """Live channels among `streamers`, keyed by slug; read from the channels' `stream` object."""
+        if not self.channels_url:
+            return {}
+        channels = await self._channels(token).load_many(s["login"] for s in streamers)
+        live: Dict[str, Dict] = {}
+        for slug, channel in channels.items():
+            stream = channel.get("stream") if isinstance(channel.get("stream"), dict) else {}
+            if stream.get("is_live"):
+                live[slug] = {
+                    "viewers": stream.get("viewer_count"),
+                    "title": channel.get("stream_title"),
+                    "started_at": stream.get("start_time"),
+                }
+        return live
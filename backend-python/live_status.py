@@ -0,0 +1,107 @@
+import asyncio
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from batch_loader import loader_scope
+from db import read_async
+from store import followed_streamers
+
+# provider -> coroutine taking [{"login", "provider_id"}] and returning {login: stream info} for live ones.
+StreamFetcher = Callable[[List[Dict]], Awaitable[Dict[str, Dict]]]
+
+LIVE_POLL_MIN_INTERVAL = float(os.environ.get("LIVE_POLL_MIN_INTERVAL", "30"))
+LIVE_POLL_MAX_INTERVAL = float(os.environ.get("LIVE_POLL_MAX_INTERVAL", "180"))
+# Public fields this service adds to follow items.
+LIVE_FIELDS = ("live", "viewers", "stale")
+
+
+class LiveStatusService:
+    """One poll loop that tracks which followed streamers are live, for every user.
+
+    Each pass polls the union of followed channels in provider batches and
+    swaps in a new snapshot dict; `generation` moves only when the live set or
+    viewer counts changed. Readers join a user's follows against the snapshot
+    with one dict lookup per follow. The interval drops back to `min_interval`
+    after a change and backs off towards `max_interval` while nothing moves.
+    When a provider's poll fails (outage, open circuit), its last known state
+    is kept and reported with `stale: true` until a poll succeeds again.
+    """
+
+    def __init__(
+        self,
+        fetchers: Dict[str, StreamFetcher],
+        min_interval: float = LIVE_POLL_MIN_INTERVAL,
+        max_interval: float = LIVE_POLL_MAX_INTERVAL,
+    ):
+        self.fetchers = fetchers
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.interval = min_interval
+        self.generation = 0
+        self.polled_at: Optional[datetime] = None
+        self.tracked = 0
+        self.failed_polls = 0
+        self._live: Dict[Tuple[str, str], Dict] = {}
+        self._stale: Set[str] = set()
+
+    def status(self, provider: str, login: str) -> Dict:
+        info = self._live.get((provider, login))
+        return {
+            "live": info is not None,
+            "viewers": info.get("viewers") if info else None,
+            "stale": provider in self._stale,
+        }
+
+    async def poll_once(self) -> None:
+        rows = await read_async(followed_streamers)
+        by_provider: Dict[str, List[Dict]] = defaultdict(list)
+        for row in rows:
+            if row.provider in self.fetchers:
+                by_provider[row.provider].append({"login": row.login, "provider_id": row.provider_id})
+        self.tracked = sum(len(v) for v in by_provider.values())
+
+        snapshot: Dict[Tuple[str, str], Dict] = {}
+        stale: Set[str] = set()
+        with loader_scope():
+            results = await asyncio.gather(
+                *(self.fetchers[p](streamers) for p, streamers in by_provider.items()), return_exceptions=True
+            )
+        for provider, result in zip(by_provider, results):
+            if isinstance(result, BaseException):
+                # Keep this provider's last known state rather than reporting everyone offline.
+                self.failed_polls += 1
+                stale.add(provider)
+                snapshot.update({key: info for key, info in self._live.items() if key[0] == provider})
+                continue
+            snapshot.update({(provider, login): info for login, info in result.items()})
+
+        self.polled_at = datetime.utcnow()
+        if snapshot != self._live or stale != self._stale:
+            self._live = snapshot
+            self._stale = stale
+            self.generation += 1
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except Exception:
+                self.failed_polls += 1
+                self.interval = self.max_interval
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict:
+        return {
+            "generation": self.generation,
+            "tracked": self.tracked,
+            "live": len(self._live),
+            "stale": sorted(self._stale),
+            "interval": self.interval,
+            "failedPolls": self.failed_polls,
+            "polledAt": self.polled_at.isoformat() if self.polled_at else None,
+        }
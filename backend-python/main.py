@@ -1,34 +1,118 @@
+import asyncio
 import os
 import base64
 import hashlib
+import hmac
+import json
 import secrets
-from pathlib import Path
-from typing import Dict, List, Set, Optional
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Literal
 from uuid import UUID, uuid4
 from urllib.parse import urlencode
 
-import httpx
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException
+import httpx
+from fastapi import BackgroundTasks, Depends, FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
-from pydantic import BaseModel, Field
-from sqlmodel import Field as SQLField, Session, SQLModel, create_engine, select
-from sqlalchemy import delete
+from fastapi.responses import JSONResponse, RedirectResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlmodel import Session
 
 # Ensure .env is loaded relative to this file, even if CWD differs
 load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env")
 
-app = FastAPI(title="Python Rewards API", version="0.1.0")
+from app_token import TWITCH_TOKEN_URL, AppTokenManager  # noqa: E402
+from batch_loader import loader_scope, loader_stats  # noqa: E402
+from circuit_breaker import CircuitBreakers, CircuitOpenError  # noqa: E402
+from db import get_session, init_db, read_async, run_db, shutdown_db_executor  # noqa: E402
+from http_cache import ResponseCache  # noqa: E402
+from http_clients import PROVIDERS, HttpClientSettings, ProviderClients  # noqa: E402
+from kick_sync import KickError, KickFollowSync  # noqa: E402
+from live_status import LIVE_FIELDS, LIVE_POLL_MIN_INTERVAL, LiveStatusService  # noqa: E402
+from oauth_state import create_state_store  # noqa: E402
+from response_cache import etag_matches, not_modified  # noqa: E402
+from pagination import InvalidCursor  # noqa: E402
+from rate_limit import RateLimiter, background  # noqa: E402
+from refresher import STREAMER_REFRESH_INTERVAL, StreamerRefresher  # noqa: E402
+from singleflight import SingleFlight  # noqa: E402
+from rewards import MAX_PAGE_SIZE, Reward, RewardCatalog, RewardCreate  # noqa: E402
+from store import (  # noqa: E402
+    FOLLOW_API_FIELDS,
+    STREAMERS_VERSION,
+    find_user,
+    follow_churn,
+    follow_watermark,
+    page_follows,
+    read_version,
+    resync_follows,
+    save_login,
+    save_steam_link,
+)
+from token_refresh import TokenRefreshError, TokenRefreshScheduler  # noqa: E402
+from twitch_sync import TWITCH_HELIX_URL, HelixClient, HelixError, TwitchFollowSync  # noqa: E402
+from write_queue import DB_WRITE_BATCHING, write, write_async, write_batcher  # noqa: E402
+
+OAUTH_STATE_SWEEP_INTERVAL = float(os.environ.get("OAUTH_STATE_SWEEP_INTERVAL", "60"))
+
+rate_limiter = RateLimiter.from_env()
+circuit_breakers = CircuitBreakers(PROVIDERS)
+provider_cache = ResponseCache.from_env()
+http_clients = ProviderClients(HttpClientSettings.from_env(), rate_limiter, circuit_breakers, provider_cache)
+provider_flights = SingleFlight()
+oauth_states = create_state_store()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    http_clients.start()
+    if DB_WRITE_BATCHING:
+        write_batcher.start()
+    # Tasks copy the context, so their provider calls queue behind interactive ones.
+    with background():
+        tasks = [asyncio.create_task(oauth_states.run_sweeper(OAUTH_STATE_SWEEP_INTERVAL))]
+        if STREAMER_REFRESH_INTERVAL > 0:
+            tasks.append(asyncio.create_task(streamer_refresher.run()))
+        if LIVE_POLL_MIN_INTERVAL > 0:
+            tasks.append(asyncio.create_task(live_status.run()))
+        tasks.append(asyncio.create_task(token_refresher.run()))
+        for app_tokens in (twitch_app_tokens, kick_app_tokens):
+            if app_tokens.configured:
+                tasks.append(asyncio.create_task(app_tokens.run()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        oauth_states.close()
+        await http_clients.aclose()
+        write_batcher.stop()
+        shutdown_db_executor()
+
+
+app = FastAPI(title="Python Rewards API", version="0.1.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+
+@app.exception_handler(CircuitOpenError)
+async def provider_unavailable(request, exc: CircuitOpenError):
+    # Fail fast while the provider is down instead of waiting out the HTTP timeout.
+    return JSONResponse(
+        {"detail": f"{exc.provider} is temporarily unavailable"},
+        status_code=503,
+        headers={"Retry-After": str(max(int(exc.retry_in), 1))},
+    )
+
+
 TWITCH_CLIENT_ID = os.environ.get("TWITCH_CLIENT_ID")
 TWITCH_CLIENT_SECRET = os.environ.get("TWITCH_CLIENT_SECRET")
 TWITCH_REDIRECT_URI = os.environ.get("TWITCH_REDIRECT_URI")
@@ -41,69 +125,57 @@ KICK_AUTH_URL = os.environ.get("KICK_AUTH_URL")
 KICK_TOKEN_URL = os.environ.get("KICK_TOKEN_URL")
 KICK_USER_URL = os.environ.get("KICK_USER_URL")
 KICK_SCOPE = os.environ.get("KICK_SCOPE", "user:read")
-DB_URL = os.environ.get("DB_URL", "sqlite:///./db.sqlite3")
-
-states: Set[str] = set()
-pkce_verifiers: Dict[str, str] = {}
-engine = create_engine(DB_URL, connect_args={"check_same_thread": False} if DB_URL.startswith("sqlite") else {})
-
-
-class RewardCreate(BaseModel):
-    title: str = Field(..., min_length=1, max_length=100)
-    description: str | None = Field(default=None, max_length=500)
-    token: str = Field(default="USDC", max_length=10)
-    amount: float = Field(..., gt=0)
-
-
-class Reward(RewardCreate):
-    id: UUID
+TWITCH_SCOPE = os.environ.get("TWITCH_SCOPE", "user:read:email user:read:follows")
+FOLLOWS_PAGE_SIZE = 100
+# Skip provider follow fetches when the user's last sync is newer than this.
+FOLLOW_RESYNC_INTERVAL = timedelta(seconds=int(os.environ.get("FOLLOW_RESYNC_INTERVAL", "300")))
+FOLLOWS_MAX_PAGE_SIZE = 500
+# Shared with the bot: signs the `link_code` the OAuth redirect hands out for `/profile <link_code>`.
+PROFILE_LINK_SECRET = os.environ.get("PROFILE_LINK_SECRET")
 
 
 class SteamLinkRequest(BaseModel):
     steamTradeLink: str | None = None
 
 
-class User(SQLModel, table=True):
-    id: Optional[int] = SQLField(default=None, primary_key=True)
-    kick_id: Optional[str] = SQLField(default=None, index=True)
-    twitch_id: Optional[str] = SQLField(default=None, index=True)
-    email: Optional[str] = None
-    display_name: Optional[str] = None
-    steam_trade_link: Optional[str] = None
-    avatar_url: Optional[str] = None
-
-
-class AuthToken(SQLModel, table=True):
-    id: Optional[int] = SQLField(default=None, primary_key=True)
-    user_id: Optional[int] = SQLField(default=None, foreign_key="user.id")
-    provider: str
-    access_token: str
-    refresh_token: Optional[str] = None
-    expires_at: Optional[datetime] = None
-    token_type: Optional[str] = None
-
-
 class FollowedStreamer(BaseModel):
     platform: str
     login: str
     display_name: str
     followers: int | None = None
     avatar: str | None = None
+    live: bool = False
+    viewers: int | None = None
+    stale: bool = False
 
 
-class Follow(SQLModel, table=True):
-    id: Optional[int] = SQLField(default=None, primary_key=True)
-    user_id: Optional[int] = SQLField(default=None, foreign_key="user.id")
-    provider: str
-    login: str
-    display_name: str
-    followers: Optional[int] = None
-    avatar: Optional[str] = None
+class LinkedAccount(BaseModel):
+    id: str | None = None
+    linked: bool = False
+
 
+class ProfileStats(BaseModel):
+    totalPrizes: int = 0
+    totalAmountUsd: float = 0.0
+    monthlyPrizes: int = 0
 
-rewards: List[Reward] = [
-    Reward(
-        id=uuid4(),
+
+class MeProfile(BaseModel):
+    userId: int | None = None
+    displayName: str | None = None
+    avatar: str | None = None
+    kick: LinkedAccount = LinkedAccount()
+    twitch: LinkedAccount = LinkedAccount()
+    steamTradeLink: str | None = None
+    follows: List[FollowedStreamer] = []
+    followsNextCursor: str | None = None
+    participationActive: bool = False
+    stats: ProfileStats = ProfileStats()
+
+
+
+DEFAULT_REWARDS = [
+    RewardCreate(
         title="Welcome Airdrop",
         description="First time viewer bonus",
         token="USDC",
@@ -111,49 +183,110 @@ rewards: List[Reward] = [
     )
 ]
 steam_link: str | None = None
+twitch_app_tokens = AppTokenManager(http_clients, "twitch", TWITCH_TOKEN_URL, TWITCH_CLIENT_ID, TWITCH_CLIENT_SECRET)
+helix = HelixClient(http_clients, TWITCH_CLIENT_ID or "", twitch_app_tokens, flights=provider_flights)
+twitch_follow_sync = TwitchFollowSync(helix)
+kick_app_tokens = AppTokenManager(http_clients, "kick", KICK_TOKEN_URL, KICK_CLIENT_ID, KICK_CLIENT_SECRET)
+kick_follow_sync = KickFollowSync(http_clients, KICK_CLIENT_ID or "", flights=provider_flights)
+
+
+async def kick_lookup(fetch: Callable[[str, List[Dict]], Awaitable], streamers: List[Dict]):
+    # Background Kick lookups run only on the app's client-credentials token, never on a user's.
+    token = await kick_app_tokens.get()
+    try:
+        return await fetch(token, streamers)
+    except KickError as exc:
+        if exc.status_code == 401:
+            kick_app_tokens.invalidate(token)
+        raise
+
 
+async def fetch_twitch_channels(streamers: List[Dict]) -> List[Dict]:
+    # Profiles use the cached app access token. Follower totals need a user token, and no
+    # user's token is borrowed for background lookups, so they are left out.
+    return await twitch_follow_sync.fetch_channels(None, streamers)
 
-def get_session():
-    with Session(engine) as session:
-        yield session
 
+async def fetch_kick_channels(streamers: List[Dict]) -> List[Dict]:
+    return await kick_lookup(kick_follow_sync.fetch_channels, streamers)
 
-def init_db():
-    SQLModel.metadata.create_all(engine)
+
+async def fetch_twitch_streams(streamers: List[Dict]) -> Dict[str, Dict]:
+    return await twitch_follow_sync.fetch_streams(None, streamers)
+
+
+async def fetch_kick_streams(streamers: List[Dict]) -> Dict[str, Dict]:
+    return await kick_lookup(kick_follow_sync.fetch_streams, streamers)
+
+
+# Without a Kick app token there is no credential to look channels up with, so Kick is skipped.
+channel_fetchers: Dict[str, Callable[[List[Dict]], Awaitable]] = {"twitch": fetch_twitch_channels}
+stream_fetchers: Dict[str, Callable[[List[Dict]], Awaitable]] = {"twitch": fetch_twitch_streams}
+if kick_app_tokens.configured:
+    channel_fetchers["kick"] = fetch_kick_channels
+    stream_fetchers["kick"] = fetch_kick_streams
+streamer_refresher = StreamerRefresher(channel_fetchers)
+live_status = LiveStatusService(stream_fetchers)
+reward_catalog = RewardCatalog()
+reward_list_adapter = TypeAdapter(List[Reward])
 
 
 init_db()
+write(reward_catalog.seed, DEFAULT_REWARDS)
 
 
-def upsert_token(session: Session, user: User, provider: str, token_data: Dict):
-    expires_in = token_data.get("expires_in")
-    expires_at = datetime.utcnow() + timedelta(seconds=expires_in) if expires_in else None
-    token = session.exec(
-        select(AuthToken).where(AuthToken.user_id == user.id, AuthToken.provider == provider)
-    ).first()
-    if not token:
-        token = AuthToken(user_id=user.id, provider=provider)
-        session.add(token)
-    token.access_token = token_data.get("access_token", "")
-    token.refresh_token = token_data.get("refresh_token")
-    token.token_type = token_data.get("token_type")
-    token.expires_at = expires_at
-    session.commit()
-
-def replace_follows(session: Session, user: User, provider: str, entries: List[Dict]):
-    session.exec(delete(Follow).where(Follow.user_id == user.id, Follow.provider == provider))
-    session.commit()
-    for e in entries:
-        follow = Follow(
-            user_id=user.id,
-            provider=provider,
-            login=e.get("login", ""),
-            display_name=e.get("display_name", ""),
-            followers=e.get("followers"),
-            avatar=e.get("avatar"),
-        )
-        session.add(follow)
-    session.commit()
+def save_twitch_login(session: Session, user: Dict, token_data: Dict) -> int:
+    return save_login(
+        session,
+        "twitch",
+        user.get("id"),
+        {"display_name": user.get("display_name"), "avatar_url": user.get("avatar")},
+        token_data,
+    )
+
+
+async def refresh_follows(user_id: int, provider: str, fetch: Callable[[], Awaitable[List[Dict]]]) -> None:
+    watermark = await read_async(follow_watermark, user_id, provider)
+    if watermark and datetime.utcnow() - watermark.synced_at < FOLLOW_RESYNC_INTERVAL:
+        return
+    try:
+        with background(), loader_scope():
+            entries = await fetch()
+    except (HelixError, KickError, httpx.HTTPError):
+        # Keep the last synced follows; the next login retries.
+        return
+    await write_async(resync_follows, user_id, provider, entries)
+
+
+def save_kick_login(session: Session, user: Dict, token_data: Dict) -> int:
+    kick_id = None
+    kick_display = None
+    kick_email = None
+    avatar = None
+    if isinstance(user, dict):
+        data = user.get("data")
+        if isinstance(data, list) and data:
+            first = data[0]
+            kick_id = str(first.get("user_id") or "")
+            kick_display = first.get("name")
+            kick_email = first.get("email")
+            avatar = first.get("profile_picture")
+    return save_login(
+        session,
+        "kick",
+        kick_id,
+        {"display_name": kick_display, "email": kick_email, "avatar_url": avatar},
+        token_data,
+    )
+
+
+def profile_link_params(user_id: int) -> Dict[str, str]:
+    """`link_code` for the bot: `<user_id>.<hmac>`, so only whoever completed the OAuth flow can bind the profile."""
+    if not PROFILE_LINK_SECRET:
+        return {}
+    signature = hmac.new(PROFILE_LINK_SECRET.encode(), str(user_id).encode(), hashlib.sha256).hexdigest()
+    return {"link_code": f"{user_id}.{signature[:32]}"}
+
 
 def ensure_twitch_config() -> None:
     if not ENABLE_TWITCH:
@@ -181,20 +314,19 @@ def ensure_kick_config() -> None:
 
 
 async def exchange_code_for_token(code: str) -> Dict:
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.post(
-            "https://id.twitch.tv/oauth2/token",
-            data={
-                "client_id": TWITCH_CLIENT_ID,
-                "client_secret": TWITCH_CLIENT_SECRET,
-                "code": code,
-                "grant_type": "authorization_code",
-                "redirect_uri": TWITCH_REDIRECT_URI,
-            },
-        )
-        if resp.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to exchange code for token")
-        return resp.json()
+    resp = await http_clients.get("twitch").post(
+        TWITCH_TOKEN_URL,
+        data={
+            "client_id": TWITCH_CLIENT_ID,
+            "client_secret": TWITCH_CLIENT_SECRET,
+            "code": code,
+            "grant_type": "authorization_code",
+            "redirect_uri": TWITCH_REDIRECT_URI,
+        },
+    )
+    if resp.status_code != 200:
+        raise HTTPException(status_code=400, detail="Failed to exchange code for token")
+    return resp.json()
 
 def generate_pkce() -> tuple[str, str]:
     verifier = secrets.token_urlsafe(64)
@@ -203,56 +335,94 @@ def generate_pkce() -> tuple[str, str]:
 
 
 async def fetch_twitch_user(access_token: str) -> Dict:
+    return await provider_flights.do(("twitch", "/users", access_token, ()), _fetch_twitch_user, access_token)
+
+
+async def _fetch_twitch_user(access_token: str) -> Dict:
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Client-Id": TWITCH_CLIENT_ID or "",
     }
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get("https://api.twitch.tv/helix/users", headers=headers)
-        if resp.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to fetch user from Twitch")
-        payload = resp.json()
-        data = payload.get("data") or []
-        if not data:
-            raise HTTPException(status_code=400, detail="No user info returned from Twitch")
-        user = data[0]
-        return {
-            "id": user.get("id"),
-            "login": user.get("login"),
-            "display_name": user.get("display_name"),
-            "avatar": user.get("profile_image_url"),
-        }
+    resp = await http_clients.get("twitch").get(f"{TWITCH_HELIX_URL}/users", headers=headers)
+    if resp.status_code != 200:
+        raise HTTPException(status_code=400, detail="Failed to fetch user from Twitch")
+    payload = resp.json()
+    data = payload.get("data") or []
+    if not data:
+        raise HTTPException(status_code=400, detail="No user info returned from Twitch")
+    user = data[0]
+    return {
+        "id": user.get("id"),
+        "login": user.get("login"),
+        "display_name": user.get("display_name"),
+        "avatar": user.get("profile_image_url"),
+    }
+
+
+async def refresh_twitch_token(refresh_token: str) -> Dict:
+    resp = await http_clients.get("twitch").post(
+        TWITCH_TOKEN_URL,
+        data={
+            "client_id": TWITCH_CLIENT_ID,
+            "client_secret": TWITCH_CLIENT_SECRET,
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+        },
+    )
+    if resp.status_code != 200:
+        raise TokenRefreshError("twitch", resp.status_code, resp.text[:200])
+    return resp.json()
 
 
 async def exchange_code_for_token_kick(code: str, verifier: str | None) -> Dict:
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.post(
-            KICK_TOKEN_URL or "",
-            data={
-                "client_id": KICK_CLIENT_ID,
-                "client_secret": KICK_CLIENT_SECRET,
-                "code": code,
-                "grant_type": "authorization_code",
-                "redirect_uri": KICK_REDIRECT_URI,
-                "code_verifier": verifier or "",
-            },
-        )
-        if resp.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to exchange code for token (Kick)")
-        return resp.json()
+    resp = await http_clients.get("kick").post(
+        KICK_TOKEN_URL or "",
+        data={
+            "client_id": KICK_CLIENT_ID,
+            "client_secret": KICK_CLIENT_SECRET,
+            "code": code,
+            "grant_type": "authorization_code",
+            "redirect_uri": KICK_REDIRECT_URI,
+            "code_verifier": verifier or "",
+        },
+    )
+    if resp.status_code != 200:
+        raise HTTPException(status_code=400, detail="Failed to exchange code for token (Kick)")
+    return resp.json()
+
+
+async def refresh_kick_token(refresh_token: str) -> Dict:
+    resp = await http_clients.get("kick").post(
+        KICK_TOKEN_URL or "",
+        data={
+            "client_id": KICK_CLIENT_ID,
+            "client_secret": KICK_CLIENT_SECRET,
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+        },
+    )
+    if resp.status_code != 200:
+        raise TokenRefreshError("kick", resp.status_code, resp.text[:200])
+    return resp.json()
+
+
+token_refresher = TokenRefreshScheduler({"twitch": refresh_twitch_token, "kick": refresh_kick_token})
 
 
 async def fetch_kick_user(access_token: str) -> Dict:
+    return await provider_flights.do(("kick", KICK_USER_URL, access_token, ()), _fetch_kick_user, access_token)
+
+
+async def _fetch_kick_user(access_token: str) -> Dict:
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Client-Id": KICK_CLIENT_ID or "",
     }
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(KICK_USER_URL or "", headers=headers)
-        if resp.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to fetch user from Kick")
-        data = resp.json()
-        return data
+    resp = await http_clients.get("kick").get(KICK_USER_URL or "", headers=headers)
+    if resp.status_code != 200:
+        raise HTTPException(status_code=400, detail="Failed to fetch user from Kick")
+    data = resp.json()
+    return data
 
 
 @app.get("/health")
@@ -260,54 +430,136 @@ def health():
     return {"ok": True, "service": "python-api"}
 
 
+@app.get("/metrics")
+async def metrics():
+    # Runs on the event loop, which owns the limiter, breakers and caches it reads; only
+    # the state store may touch SQLite, so that call goes to the DB executor.
+    return {
+        "oauthStates": await run_db(oauth_states.stats),
+        "followSync": dict(follow_churn),
+        "streamerRefresh": streamer_refresher.stats(),
+        "liveStatus": live_status.stats(),
+        "tokenRefresh": token_refresher.stats(),
+        "twitchAppToken": twitch_app_tokens.stats(),
+        "kickAppToken": kick_app_tokens.stats(),
+        "rateLimits": rate_limiter.stats(),
+        "circuitBreakers": circuit_breakers.stats(),
+        "providerCache": provider_cache.stats(),
+        "providerCoalescing": provider_flights.stats(),
+        "batchLoaders": dict(loader_stats),
+        "writeBatching": write_batcher.stats(),
+        "rewardResponses": reward_catalog.responses.stats(),
+    }
+
+
 @app.get("/steam/link")
 def get_steam_link(user_id: int | None = None, session: Session = Depends(get_session)):
-    db_user = session.exec(select(User).where(User.id == user_id)).first() if user_id else session.exec(select(User)).first()
+    db_user = find_user(session, user_id)
     link = db_user.steam_trade_link if db_user else None
     return {"steamTradeLink": link}
 
 
 @app.post("/steam/link")
-def set_steam_link(payload: SteamLinkRequest, user_id: int | None = None, session: Session = Depends(get_session)):
-    db_user = session.exec(select(User).where(User.id == user_id)).first() if user_id else session.exec(select(User)).first()
+def set_steam_link(payload: SteamLinkRequest, user_id: int | None = None):
+    return write(save_steam_link, user_id, payload.steamTradeLink)
+
+
+def follow_status(provider: str, login: str) -> Dict:
+    # `stale` covers both a failed live poll and metadata kept after a failed refresh.
+    status = live_status.status(provider, login)
+    if not status["stale"] and streamer_refresher.stale(provider, login):
+        status["stale"] = True
+    return status
+
+
+def live_extra(fields: List[str]) -> Callable[[str, str], Dict] | None:
+    if not fields:
+        return None
+    if len(fields) == len(LIVE_FIELDS):
+        return follow_status
+    return lambda provider, login: {f: v for f, v in follow_status(provider, login).items() if f in fields}
+
+
+@app.get("/streamers/following", response_model=List[FollowedStreamer])
+def get_following(
+    user_id: int | None = None,
+    platform: Literal["kick", "twitch"] | None = None,
+    fields: str | None = Query(default=None, description="Comma-separated subset of FollowedStreamer fields"),
+    limit: int = Query(default=FOLLOWS_PAGE_SIZE, ge=1, le=FOLLOWS_MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    session: Session = Depends(get_session),
+):
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    unknown = set(selected or ()) - set(FOLLOW_API_FIELDS) - set(LIVE_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    columns = [f for f in selected if f in FOLLOW_API_FIELDS] if selected else None
+    live_fields = [f for f in selected or LIVE_FIELDS if f in LIVE_FIELDS]
+    db_user = find_user(session, user_id)
     if not db_user:
-        db_user = User()
-        session.add(db_user)
-    db_user.steam_trade_link = payload.steamTradeLink
-    session.commit()
-    session.refresh(db_user)
-    return {"steamTradeLink": db_user.steam_trade_link, "userId": db_user.id}
-
-
-@app.get("/streamers/following")
-def get_following(user_id: int | None = None, session: Session = Depends(get_session)) -> List[FollowedStreamer]:
-    db_user = session.exec(select(User).where(User.id == user_id)).first() if user_id else session.exec(select(User)).first()
-    if not db_user:
-        return []
-    follows = session.exec(select(Follow).where(Follow.user_id == db_user.id)).all()
-    return [
-        FollowedStreamer(
-            platform=f.provider,
-            login=f.login,
-            display_name=f.display_name,
-            followers=f.followers,
-            avatar=f.avatar,
+        return JSONResponse([])
+    # follows_version changes on every follow write and the streamers version on every shared
+    # metadata write, so together they validate every page/filter combination of stored data.
+    # Live/stale state is held per process (each worker polls on its own), so its part of the
+    # ETag is a digest of the values this response carries, never an in-process counter.
+    params = json.dumps([platform, selected, limit, cursor])
+    version = f"{db_user.follows_version}.{read_version(session, STREAMERS_VERSION)}"
+
+    def follows_etag(content: str) -> str:
+        return f'W/"follows-{db_user.id}-{version}-{hashlib.sha1(content.encode()).hexdigest()[:16]}"'
+
+    etag = follows_etag(params)
+    if not live_fields and etag_matches(if_none_match, etag):
+        return not_modified(etag, {"ETag": etag, "Cache-Control": "private, no-cache"})
+    try:
+        items, next_cursor = page_follows(
+            session, db_user.id, platform, limit, cursor, columns, live_extra(live_fields)
         )
-        for f in follows
-    ]
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if live_fields:
+        etag = follows_etag(params + json.dumps([[item.get(f) for f in live_fields] for item in items]))
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if live_fields and etag_matches(if_none_match, etag):
+        return not_modified(etag, headers)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return JSONResponse(items, headers=headers)
+
+
+@app.get("/me")
+def get_me(user_id: int | None = None, session: Session = Depends(get_session)) -> MeProfile:
+    """Everything the profile page and the bot render on load: one session, two indexed queries."""
+    db_user = find_user(session, user_id)
+    if not db_user:
+        return MeProfile()
+    linked = bool(db_user.kick_id or db_user.twitch_id)
+    follows, follows_cursor = page_follows(session, db_user.id, limit=FOLLOWS_PAGE_SIZE, extra=follow_status)
+    return MeProfile(
+        userId=db_user.id,
+        displayName=db_user.display_name,
+        avatar=db_user.avatar_url,
+        kick=LinkedAccount(id=db_user.kick_id, linked=bool(db_user.kick_id)),
+        twitch=LinkedAccount(id=db_user.twitch_id, linked=bool(db_user.twitch_id)),
+        steamTradeLink=db_user.steam_trade_link,
+        follows=follows,
+        followsNextCursor=follows_cursor,
+        participationActive=linked and bool(db_user.steam_trade_link),
+    )
 
 
 @app.get("/auth/twitch/start")
 async def auth_twitch_start():
     ensure_twitch_config()
     state = uuid4().hex
-    states.add(state)
+    await run_db(oauth_states.put, state)
     params = urlencode(
         {
             "client_id": TWITCH_CLIENT_ID,
             "redirect_uri": TWITCH_REDIRECT_URI,
             "response_type": "code",
-            "scope": "user:read:email",
+            "scope": TWITCH_SCOPE,
             "state": state,
         }
     )
@@ -316,49 +568,30 @@ async def auth_twitch_start():
 
 
 @app.get("/auth/twitch/callback")
-async def auth_twitch_callback(code: str | None = None, state: str | None = None, session: Session = Depends(get_session)):
+async def auth_twitch_callback(background_tasks: BackgroundTasks, code: str | None = None, state: str | None = None):
     ensure_twitch_config()
     if not code or not state:
         raise HTTPException(status_code=400, detail="Code or state is missing")
-    if state not in states:
+    if await run_db(oauth_states.pop, state) is None:
         raise HTTPException(status_code=400, detail="Invalid state")
-    states.discard(state)
 
     token_data = await exchange_code_for_token(code)
     access_token = token_data.get("access_token")
     if not access_token:
         raise HTTPException(status_code=400, detail="No access token in Twitch response")
     user = await fetch_twitch_user(access_token)
-    twitch_id = user.get("id") if isinstance(user, dict) else None
-    db_user = None
-    if twitch_id:
-        db_user = session.exec(select(User).where(User.twitch_id == twitch_id)).first()
-    if not db_user:
-        db_user = User(twitch_id=twitch_id)
-        session.add(db_user)
-    db_user.display_name = user.get("display_name")
-    db_user.avatar_url = user.get("avatar")
-    session.commit()
-    session.refresh(db_user)
-    upsert_token(session, db_user, "twitch", token_data)
-    replace_follows(
-        session,
-        db_user,
-        "twitch",
-        [
-          {
-            "login": user.get("login") or "twitch_user",
-            "display_name": user.get("display_name") or "twitch_user",
-            "followers": 1200,
-            "avatar": user.get("avatar"),
-          }
-        ],
-    )
+    user_id = await write_async(save_twitch_login, user, token_data)
+    token_refresher.track(user_id, "twitch", token_data)
+    if user.get("id"):
+        background_tasks.add_task(
+            refresh_follows, user_id, "twitch", partial(twitch_follow_sync.fetch_follows, user["id"], access_token)
+        )
     redirect_params = {
         "twitch_user": user.get("display_name") or user.get("login") or "",
         "twitch_id": user.get("id") or "",
         "twitch_avatar": user.get("avatar") or "",
-        "user_id": db_user.id,
+        "user_id": user_id,
+        **profile_link_params(user_id),
     }
     if FRONTEND_URL:
         url = f"{FRONTEND_URL}?{urlencode(redirect_params)}"
@@ -377,9 +610,8 @@ async def auth_twitch_callback(code: str | None = None, state: str | None = None
 async def auth_kick_start():
     ensure_kick_config()
     state = uuid4().hex
-    states.add(state)
     verifier, challenge = generate_pkce()
-    pkce_verifiers[state] = verifier
+    await run_db(oauth_states.put, state, verifier)
     params = urlencode(
         {
             "client_id": KICK_CLIENT_ID,
@@ -396,57 +628,26 @@ async def auth_kick_start():
 
 
 @app.get("/auth/kick/callback")
-async def auth_kick_callback(code: str | None = None, state: str | None = None, session: Session = Depends(get_session)):
+async def auth_kick_callback(background_tasks: BackgroundTasks, code: str | None = None, state: str | None = None):
     ensure_kick_config()
     if not code or not state:
         raise HTTPException(status_code=400, detail="Code or state is missing")
-    if state not in states:
+    entry = await run_db(oauth_states.pop, state)
+    if entry is None:
         raise HTTPException(status_code=400, detail="Invalid state")
-    states.discard(state)
-    verifier = pkce_verifiers.pop(state, None)
+    verifier = entry.verifier
 
     token_data = await exchange_code_for_token_kick(code, verifier)
     access_token = token_data.get("access_token")
     if not access_token:
         raise HTTPException(status_code=400, detail="No access token in Kick response")
     user = await fetch_kick_user(access_token)
-    kick_id = None
-    kick_display = None
-    kick_email = None
-    avatar = None
-    if isinstance(user, dict):
-        data = user.get("data")
-        if isinstance(data, list) and data:
-            first = data[0]
-            kick_id = str(first.get("user_id") or "")
-            kick_display = first.get("name")
-            kick_email = first.get("email")
-            avatar = first.get("profile_picture")
-    db_user = None
-    if kick_id:
-        db_user = session.exec(select(User).where(User.kick_id == kick_id)).first()
-    if not db_user:
-        db_user = User(kick_id=kick_id)
-        session.add(db_user)
-    db_user.display_name = kick_display or db_user.display_name
-    db_user.email = kick_email or db_user.email
-    db_user.avatar_url = avatar or db_user.avatar_url
-    session.commit()
-    session.refresh(db_user)
-    upsert_token(session, db_user, "kick", token_data)
-    replace_follows(
-        session,
-        db_user,
-        "kick",
-        [
-          {
-            "login": kick_display or "kick_user",
-            "display_name": kick_display or "kick_user",
-            "followers": 352,
-            "avatar": avatar,
-          }
-        ],
-    )
+    user_id = await write_async(save_kick_login, user, token_data)
+    token_refresher.track(user_id, "kick", token_data)
+    if kick_follow_sync.enabled:
+        background_tasks.add_task(
+            refresh_follows, user_id, "kick", partial(kick_follow_sync.fetch_follows, access_token)
+        )
     user_data = None
     if isinstance(user, dict):
         if isinstance(user.get("data"), list) and user["data"]:
@@ -456,7 +657,8 @@ async def auth_kick_callback(code: str | None = None, state: str | None = None,
         "kick_email": (user_data or {}).get("email") or "",
         "kick_id": (user_data or {}).get("user_id") or "",
         "kick_avatar": (user_data or {}).get("profile_picture") or "",
-        "user_id": db_user.id,
+        "user_id": user_id,
+        **profile_link_params(user_id),
     }
     target = FRONTEND_URL
     if target:
@@ -473,29 +675,53 @@ async def auth_kick_callback(code: str | None = None, state: str | None = None,
 
 
 @app.get("/rewards", response_model=List[Reward])
-def list_rewards():
-    return rewards
+def list_rewards(
+    token: str | None = None,
+    min_amount: float | None = Query(default=None, ge=0),
+    max_amount: float | None = Query(default=None, ge=0),
+    sort: Literal["created", "-created", "amount", "-amount"] = "created",
+    limit: int = Query(default=50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    accept_encoding: str | None = Header(default=None),
+    session: Session = Depends(get_session),
+):
+    # Served from pre-encoded bytes keyed by catalog version; a matching
+    # If-None-Match returns 304 before any query or serialization.
+    version = reward_catalog.version(session)
+    params = (token, min_amount, max_amount, sort, limit, cursor)
+    digest = hashlib.sha1(json.dumps(params).encode()).hexdigest()[:16]
+    etag = f'"rewards-{version}-{digest}"'
+    cache_headers = {"Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, cache_headers)
+    entry = reward_catalog.responses.get((version, params))
+    if entry is None:
+        try:
+            items, next_cursor = reward_catalog.page(session, token, min_amount, max_amount, sort, limit, cursor)
+        except InvalidCursor as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        headers = dict(cache_headers)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        entry = reward_catalog.responses.put((version, params), etag, reward_list_adapter.dump_json(items), headers)
+    return entry.response(accept_encoding)
 
 
 @app.post("/rewards", response_model=Reward, status_code=201)
 def create_reward(payload: RewardCreate):
-    reward = Reward(id=uuid4(), **payload.model_dump())
-    rewards.append(reward)
-    return reward
+    return write(reward_catalog.create, payload)
 
 
 @app.get("/rewards/{reward_id}", response_model=Reward)
-def get_reward(reward_id: UUID):
-    for reward in rewards:
-        if reward.id == reward_id:
-            return reward
-    raise HTTPException(status_code=404, detail="Reward not found")
+def get_reward(reward_id: UUID, session: Session = Depends(get_session)):
+    reward = reward_catalog.get(session, reward_id)
+    if reward is None:
+        raise HTTPException(status_code=404, detail="Reward not found")
+    return reward
 
 
 @app.delete("/rewards/{reward_id}", status_code=204)
 def delete_reward(reward_id: UUID):
-    global rewards
-    before = len(rewards)
-    rewards = [r for r in rewards if r.id != reward_id]
-    if len(rewards) == before:
+    if not write(reward_catalog.delete, reward_id):
         raise HTTPException(status_code=404, detail="Reward not found")
@@ -0,0 +1,127 @@
+from typing import Callable, List, Set
+
+from sqlalchemy import Connection
+
+# Every step checks the tables/columns it reads first, so re-running one on a
+# schema that already has it (e.g. after user_version was reset) is a no-op.
+
+
+def _columns(conn: Connection, table: str) -> Set[str]:
+    """Column names of `table`; empty when the table does not exist."""
+    return {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{table}")')}
+
+
+def _unique_identities(conn: Connection) -> None:
+    # Older databases could hold race-created duplicates; keep the row the
+    # app was already resolving to (lowest user id, newest token).
+    user_columns = _columns(conn, "user")
+    for column in ("kick_id", "twitch_id"):
+        if column not in user_columns:
+            continue
+        conn.exec_driver_sql(f'UPDATE "user" SET {column} = NULL WHERE {column} = \'\'')
+        conn.exec_driver_sql(
+            f'UPDATE "user" SET {column} = NULL WHERE {column} IS NOT NULL AND id NOT IN '
+            f'(SELECT MIN(id) FROM "user" WHERE {column} IS NOT NULL GROUP BY {column})'
+        )
+        conn.exec_driver_sql(f"DROP INDEX IF EXISTS ix_user_{column}")
+        conn.exec_driver_sql(f'CREATE UNIQUE INDEX ix_user_{column} ON "user" ({column})')
+    if not {"user_id", "provider"} <= _columns(conn, "authtoken"):
+        return
+    conn.exec_driver_sql(
+        "DELETE FROM authtoken WHERE id NOT IN (SELECT MAX(id) FROM authtoken GROUP BY user_id, provider)"
+    )
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_authtoken_user_provider ON authtoken (user_id, provider)"
+    )
+
+
+def _follow_composite_index(conn: Connection) -> None:
+    if not {"user_id", "provider", "login"} <= _columns(conn, "follow"):
+        return
+    conn.exec_driver_sql(
+        "DELETE FROM follow WHERE id NOT IN (SELECT MAX(id) FROM follow GROUP BY user_id, provider, login)"
+    )
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_follow_user_provider_login ON follow (user_id, provider, login)"
+    )
+
+
+def _user_follows_version(conn: Connection) -> None:
+    columns = _columns(conn, "user")
+    if columns and "follows_version" not in columns:
+        conn.exec_driver_sql('ALTER TABLE "user" ADD COLUMN follows_version INTEGER NOT NULL DEFAULT 0')
+
+
+def _normalize_streamers(conn: Connection) -> None:
+    columns = _columns(conn, "follow")
+    if not columns or not _columns(conn, "streamer"):
+        return
+    copied = [c for c in ("display_name", "followers", "avatar") if c in columns]
+    if copied:
+        # Fold per-follow metadata copies into one streamer row (newest copy wins).
+        names = ", ".join(copied)
+        conn.exec_driver_sql(
+            f"INSERT OR IGNORE INTO streamer (provider, login, {names}) "
+            f"SELECT provider, login, {names} FROM follow "
+            "WHERE id IN (SELECT MAX(id) FROM follow GROUP BY provider, login)"
+        )
+    if "streamer_id" not in columns:
+        conn.exec_driver_sql("ALTER TABLE follow ADD COLUMN streamer_id INTEGER REFERENCES streamer (id)")
+    conn.exec_driver_sql(
+        "UPDATE follow SET streamer_id = "
+        "(SELECT id FROM streamer WHERE streamer.provider = follow.provider AND streamer.login = follow.login)"
+    )
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_follow_streamer ON follow (streamer_id)")
+    for column in copied:
+        conn.exec_driver_sql(f"ALTER TABLE follow DROP COLUMN {column}")
+
+
+def _streamer_refreshed_at(conn: Connection) -> None:
+    columns = _columns(conn, "streamer")
+    if not columns:
+        return
+    if "refreshed_at" not in columns:
+        conn.exec_driver_sql("ALTER TABLE streamer ADD COLUMN refreshed_at DATETIME")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_streamer_refreshed ON streamer (refreshed_at)")
+
+
+def _authtoken_expiry_index(conn: Connection) -> None:
+    if "expires_at" not in _columns(conn, "authtoken"):
+        return
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_authtoken_expires ON authtoken (expires_at)")
+
+
+def _authtoken_provider_index(conn: Connection) -> None:
+    # latest_token: provider equality, then rowid order for ORDER BY id DESC without a sort.
+    if "provider" not in _columns(conn, "authtoken"):
+        return
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_authtoken_provider ON authtoken (provider)")
+
+
+def _drop_authtoken_provider_index(conn: Connection) -> None:
+    # Background lookups no longer borrow a user's token, so nothing reads tokens by provider.
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_authtoken_provider")
+
+
+# Append-only: position + 1 is the schema version stored in PRAGMA user_version.
+MIGRATIONS: List[Callable[[Connection], None]] = [
+    _unique_identities,
+    _follow_composite_index,
+    _user_follows_version,
+    _normalize_streamers,
+    _streamer_refreshed_at,
+    _authtoken_expiry_index,
+    _authtoken_provider_index,
+    _drop_authtoken_provider_index,
+]
+
+
+def run_migrations(conn: Connection, fresh: bool) -> None:
+    """Bring the schema to `len(MIGRATIONS)` inside the caller's (write-locked) transaction."""
+    if conn.dialect.name != "sqlite":
+        return
+    version = conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+    if not fresh:
+        for migration in MIGRATIONS[version:]:
+            migration(conn)
+    conn.exec_driver_sql(f"PRAGMA user_version = {len(MIGRATIONS)}")
@@ -0,0 +1,103 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import Index
+from sqlmodel import Field as SQLField, SQLModel
+
+
+class User(SQLModel, table=True):
+    id: Optional[int] = SQLField(default=None, primary_key=True)
+    kick_id: Optional[str] = SQLField(default=None, index=True, unique=True)
+    twitch_id: Optional[str] = SQLField(default=None, index=True, unique=True)
+    email: Optional[str] = None
+    display_name: Optional[str] = None
+    steam_trade_link: Optional[str] = None
+    avatar_url: Optional[str] = None
+    follows_version: int = SQLField(default=0, sa_column_kwargs={"server_default": "0"})
+
+
+class AuthToken(SQLModel, table=True):
+    __table_args__ = (
+        Index("uq_authtoken_user_provider", "user_id", "provider", unique=True),
+        Index("ix_authtoken_expires", "expires_at"),
+    )
+
+    id: Optional[int] = SQLField(default=None, primary_key=True)
+    user_id: Optional[int] = SQLField(default=None, foreign_key="user.id")
+    provider: str
+    access_token: str
+    refresh_token: Optional[str] = None
+    expires_at: Optional[datetime] = None
+    token_type: Optional[str] = None
+
+
+class Streamer(SQLModel, table=True):
+    """One row per channel, shared by every user who follows it."""
+
+    __table_args__ = (
+        Index("ix_streamer_provider_login", "provider", "login", unique=True),
+        Index("ix_streamer_provider_id", "provider", "provider_id"),
+        Index("ix_streamer_refreshed", "refreshed_at"),
+    )
+
+    id: Optional[int] = SQLField(default=None, primary_key=True)
+    provider: str
+    login: str
+    provider_id: Optional[str] = None
+    display_name: str
+    followers: Optional[int] = None
+    avatar: Optional[str] = None
+    refreshed_at: Optional[datetime] = None
+
+
+class Follow(SQLModel, table=True):
+    """Narrow user -> streamer join; provider/login are kept for keyset paging."""
+
+    __table_args__ = (
+        Index("ix_follow_user_provider_login", "user_id", "provider", "login", unique=True),
+        Index("ix_follow_streamer", "streamer_id"),
+    )
+
+    id: Optional[int] = SQLField(default=None, primary_key=True)
+    user_id: Optional[int] = SQLField(default=None, foreign_key="user.id")
+    provider: str
+    login: str
+    streamer_id: Optional[int] = SQLField(default=None, foreign_key="streamer.id")
+
+
+class FollowSyncState(SQLModel, table=True):
+    """Watermark of a user's last follow sync per provider."""
+
+    __tablename__ = "follow_sync_state"
+
+    user_id: int = SQLField(foreign_key="user.id", primary_key=True)
+    provider: str = SQLField(primary_key=True)
+    synced_at: datetime
+    fingerprint: str
+
+
+class RewardRecord(SQLModel, table=True):
+    __tablename__ = "reward"
+    __table_args__ = (
+        Index("ix_reward_created", "created_at", "id"),
+        Index("ix_reward_amount", "amount", "id"),
+        Index("ix_reward_token_created", "token", "created_at", "id"),
+        Index("ix_reward_token_amount", "token", "amount", "id"),
+    )
+
+    id: UUID = SQLField(primary_key=True)
+    title: str
+    description: Optional[str] = None
+    token: str = "USDC"
+    amount: float
+    created_at: datetime = SQLField(default_factory=datetime.utcnow)
+
+
+class CatalogVersion(SQLModel, table=True):
+    """Monotonic change counters shared by all workers (e.g. `rewards`)."""
+
+    __tablename__ = "catalog_version"
+
+    name: str = SQLField(primary_key=True)
+    value: int = 0
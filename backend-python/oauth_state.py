@@ -0,0 +1,188 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from db import run_db
+
+
+@dataclass
+class StateEntry:
+    expires_at: float
+    verifier: Optional[str] = None
+
+
+class StateStore(ABC):
+    """Backend for OAuth `state` values and Kick PKCE verifiers.
+
+    `pop` must be atomic: a state can be consumed by exactly one callback,
+    whichever worker it lands on. Methods may block on I/O; async callers
+    go through `run_db`.
+    """
+
+    def __init__(self, ttl: float = 600.0, max_entries: int = 10_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.evicted = 0
+        self.expired = 0
+
+    @abstractmethod
+    def put(self, state: str, verifier: Optional[str] = None) -> None:
+        ...
+
+    @abstractmethod
+    def pop(self, state: str) -> Optional[StateEntry]:
+        ...
+
+    @abstractmethod
+    def sweep(self) -> int:
+        ...
+
+    @abstractmethod
+    def size(self) -> int:
+        ...
+
+    def close(self) -> None:
+        pass
+
+    async def run_sweeper(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await run_db(self.sweep)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": self.size(), "evicted": self.evicted, "expired": self.expired}
+
+
+class MemoryStateStore(StateStore):
+    """Process-local store; only valid with a single worker.
+
+    Entries share one TTL, so insertion order is also expiry order: the
+    OrderedDict gives O(1) put/pop, oldest-first eviction at the cap, and a
+    sweep that stops at the first live entry.
+    """
+
+    def __init__(self, ttl: float = 600.0, max_entries: int = 10_000):
+        super().__init__(ttl, max_entries)
+        self._entries: "OrderedDict[str, StateEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, state: str, verifier: Optional[str] = None) -> None:
+        with self._lock:
+            self._entries.pop(state, None)
+            while len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+            self._entries[state] = StateEntry(expires_at=time.monotonic() + self.ttl, verifier=verifier)
+
+    def pop(self, state: str) -> Optional[StateEntry]:
+        with self._lock:
+            entry = self._entries.pop(state, None)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self.expired += 1
+            return None
+        return entry
+
+    def sweep(self) -> int:
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            while self._entries:
+                state, entry = next(iter(self._entries.items()))
+                if entry.expires_at > now:
+                    break
+                del self._entries[state]
+                removed += 1
+            self.expired += removed
+        return removed
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteStateStore(StateStore):
+    """Shared store in a WAL-mode SQLite file, usable by every worker on a host.
+
+    `pop` is a single `DELETE ... RETURNING`, so two workers racing on the same
+    state cannot both consume it. `put` enforces the cap: after the insert an
+    indexed `COUNT(*)` decides whether the oldest entries must be evicted, so
+    the eviction scan only runs once the store is actually full.
+    """
+
+    def __init__(self, path: str, ttl: float = 600.0, max_entries: int = 10_000):
+        super().__init__(ttl, max_entries)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS oauth_state ("
+            "state TEXT PRIMARY KEY, verifier TEXT, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_oauth_state_expires_at ON oauth_state (expires_at)")
+
+    def put(self, state: str, verifier: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO oauth_state (state, verifier, expires_at) VALUES (?, ?, ?)",
+                (state, verifier, time.time() + self.ttl),
+            )
+            if self._conn.execute("SELECT COUNT(*) FROM oauth_state").fetchone()[0] > self.max_entries:
+                self.evicted += self._evict()
+
+    def _evict(self) -> int:
+        return self._conn.execute(
+            "DELETE FROM oauth_state WHERE state IN ("
+            "SELECT state FROM oauth_state ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+
+    def pop(self, state: str) -> Optional[StateEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "DELETE FROM oauth_state WHERE state = ? RETURNING verifier, expires_at", (state,)
+            ).fetchone()
+        if row is None:
+            return None
+        verifier, expires_at = row
+        if expires_at <= time.time():
+            self.expired += 1
+            return None
+        return StateEntry(expires_at=expires_at, verifier=verifier)
+
+    def sweep(self) -> int:
+        with self._lock:
+            expired = self._conn.execute("DELETE FROM oauth_state WHERE expires_at <= ?", (time.time(),)).rowcount
+            # Other workers share the file; trim whatever their puts left over the cap.
+            evicted = self._evict()
+        self.expired += expired
+        self.evicted += evicted
+        return expired + evicted
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM oauth_state").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_state_store() -> StateStore:
+    ttl = float(os.environ.get("OAUTH_STATE_TTL", "600"))
+    max_entries = int(os.environ.get("OAUTH_STATE_MAX", "10000"))
+    backend = os.environ.get("OAUTH_STATE_BACKEND", "memory").lower()
+    if backend == "memory":
+        return MemoryStateStore(ttl=ttl, max_entries=max_entries)
+    if backend == "sqlite":
+        path = os.environ.get("OAUTH_STATE_DB", "./oauth_state.sqlite3")
+        return SQLiteStateStore(path, ttl=ttl, max_entries=max_entries)
+    raise RuntimeError(f"Unknown OAUTH_STATE_BACKEND: {backend!r} (expected 'memory' or 'sqlite')")
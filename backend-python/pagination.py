@@ -0,0 +1,22 @@
+import base64
+import json
+from typing import Any, List
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Malformed cursor")
+    return values
@@ -0,0 +1,107 @@
+"""EXPLAIN QUERY PLAN check for the API's hot queries.
+
+Run `python query_plans.py` (e.g. in CI); it exits non-zero if any query
+issued by a HOT_QUERIES entry makes SQLite scan a table or a whole index,
+or sort rows an index could have returned in order. The entries call the
+real store/rewards functions; their SQL is captured with a
+`before_cursor_execute` hook and explained with the same parameters, so the
+check cannot drift from what the API actually sends.
+"""
+import sys
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import Engine, event
+from sqlmodel import Session
+
+from pagination import encode_cursor
+from rewards import RewardCatalog
+from store import (
+    find_user,
+    follow_watermark,
+    get_token,
+    page_follows,
+    refresh_streamers,
+    sync_follows,
+    tokens_expiring,
+)
+
+NOW = datetime(2026, 1, 1)
+REWARD_ID = UUID(int=1)
+FOLLOWS = [{"login": login, "display_name": login.upper(), "followers": 1} for login in ("a", "b", "c")]
+
+
+def _resync(session: Session) -> None:
+    # Second sync of the same user takes the diff path: existing links, deletes, version bump.
+    sync_follows(session, 1, "twitch", FOLLOWS)
+    sync_follows(session, 1, "twitch", [{**FOLLOWS[0], "followers": 2}, {"login": "d"}])
+
+
+# Background passes that read most of a table (stale_streamers, followed_streamers) are
+# left out: a scan is the right plan for them.
+HOT_QUERIES: Dict[str, Callable[[Session], object]] = {
+    "find_user": lambda s: find_user(s, 1),
+    "get_token": lambda s: get_token(s, 1, "twitch"),
+    "tokens_expiring": lambda s: tokens_expiring(s, NOW),
+    "follow_watermark": lambda s: follow_watermark(s, 1, "twitch"),
+    "page_follows": lambda s: page_follows(s, 1, None, 100, encode_cursor(["kick", "a"])),
+    "page_follows_platform": lambda s: page_follows(s, 1, "twitch", 100, encode_cursor(["twitch", "a"])),
+    "sync_follows": _resync,
+    "refresh_streamers": lambda s: refresh_streamers(s, "twitch", FOLLOWS, [1, 2]),
+    "reward_get": lambda s: RewardCatalog().get(s, REWARD_ID),
+    "rewards_page_created": lambda s: RewardCatalog().page(
+        s, limit=50, cursor=encode_cursor(["created", NOW.isoformat(), REWARD_ID.hex])
+    ),
+    "rewards_page_token_amount": lambda s: RewardCatalog().page(s, "USDC", 1, 100, "-amount", 50),
+}
+
+# Only these statement kinds have a plan worth checking; INSERTs are keyed by constraint.
+_PLANNED = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+def capture(engine: Engine, run: Callable[[Session], object]) -> List[Tuple[str, tuple]]:
+    """SQL and parameters of every planned statement `run` issues, in a rolled-back session."""
+    statements: List[Tuple[str, tuple]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(_PLANNED):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with Session(engine) as session:
+            run(session)
+            session.rollback()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def explain(engine: Engine, statement: str, parameters: tuple) -> List[str]:
+    with engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def check_query_plans(engine: Engine) -> Dict[str, List[Tuple[str, List[str]]]]:
+    """Return, per hot query, each captured statement whose plan scans or sorts."""
+    failures = {}
+    for name, run in HOT_QUERIES.items():
+        for statement, parameters in capture(engine, run):
+            plan = explain(engine, statement, parameters)
+            if any(step.startswith("SCAN") or step == "USE TEMP B-TREE FOR ORDER BY" for step in plan):
+                failures.setdefault(name, []).append((" ".join(statement.split()), plan))
+    return failures
+
+
+if __name__ == "__main__":
+    from sqlmodel import SQLModel, create_engine
+
+    check_engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(check_engine)
+    failed = check_query_plans(check_engine)
+    for name, statements in failed.items():
+        for statement, plan in statements:
+            print(f"{name}: {statement}\n    {' | '.join(plan)}")
+    print(f"{len(HOT_QUERIES) - len(failed)}/{len(HOT_QUERIES)} hot queries use an index")
+    sys.exit(1 if failed else 0)
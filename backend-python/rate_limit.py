@@ -0,0 +1,251 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Outbound calls default to interactive; background loops wrap themselves in `background()`.
+request_priority: ContextVar[int] = ContextVar("request_priority", default=INTERACTIVE)
+
+RATE_LIMIT_MAX_BUCKETS = int(os.environ.get("RATE_LIMIT_MAX_BUCKETS", "10000"))
+
+
+@contextmanager
+def background() -> Iterator[None]:
+    """Mark provider calls made in this context as background (yield to OAuth callbacks)."""
+    token = request_priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+@dataclass
+class ProviderLimits:
+    capacity: float
+    window: float
+    reserve: int = 5
+
+    @classmethod
+    def from_env(cls, provider: str, capacity: float, window: float) -> "ProviderLimits":
+        prefix = f"RATE_LIMIT_{provider.upper()}"
+        return cls(
+            capacity=float(os.environ.get(f"{prefix}_CAPACITY", capacity)),
+            window=float(os.environ.get(f"{prefix}_WINDOW", window)),
+            reserve=int(os.environ.get(f"{prefix}_RESERVE", "5")),
+        )
+
+
+def _header(headers: httpx.Headers, name: str) -> Optional[float]:
+    value = headers.get(name) or headers.get(f"X-{name}")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def rate_headers(headers: httpx.Headers) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    """(limit, remaining, seconds until reset) from `Ratelimit-*` / `X-RateLimit-*` headers."""
+    limit = _header(headers, "Ratelimit-Limit")
+    remaining = _header(headers, "Ratelimit-Remaining")
+    reset = _header(headers, "Ratelimit-Reset")
+    if reset is not None and reset > 1e9:
+        # Twitch sends an epoch timestamp; others send a delta.
+        reset -= time.time()
+    retry_after = _header(headers, "Retry-After")
+    if retry_after is not None:
+        reset = retry_after
+    return limit, remaining, max(reset, 0.0) if reset is not None else None
+
+
+class TokenBucket:
+    """Token bucket with a priority wait queue, resized from provider headers.
+
+    `acquire()` takes a token immediately when nobody is queued; otherwise the
+    caller waits in a heap ordered by (priority, arrival), drained by one task
+    as tokens refill. `update()` shrinks the local budget to what the provider
+    reports and pauses the bucket until the provider's reset once only the
+    reserve is left, so callers wait instead of collecting 429s.
+    """
+
+    def __init__(self, limits: ProviderLimits):
+        self.capacity = limits.capacity
+        self.window = limits.window
+        self.reserve = limits.reserve
+        self.tokens = limits.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._drainer: Optional[asyncio.Task] = None
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.window
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _take(self, now: float) -> bool:
+        if now < self.paused_until:
+            return False
+        if self.paused_until:
+            # The provider's window has reset.
+            self.paused_until = 0.0
+            self.tokens = self.capacity
+        else:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self, priority: int) -> float:
+        if not self._waiters and self._take(time.monotonic()):
+            return 0.0
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.create_task(self._drain())
+        await future
+        return time.monotonic() - started
+
+    async def _drain(self) -> None:
+        while self._waiters:
+            if self._waiters[0][2].cancelled():
+                heapq.heappop(self._waiters)
+                continue
+            now = time.monotonic()
+            if self._take(now):
+                heapq.heappop(self._waiters)[2].set_result(None)
+                continue
+            await asyncio.sleep(max(self.paused_until - now, (1 - self.tokens) / self.rate, 0.001))
+
+    def update(self, limit: Optional[float], remaining: Optional[float], reset_in: Optional[float]) -> None:
+        if limit:
+            self.capacity = limit
+        if remaining is None:
+            return
+        self.tokens = min(self.tokens, max(remaining - self.reserve, 0))
+        if remaining <= self.reserve and reset_in:
+            self.pause(reset_in)
+
+    def pause(self, seconds: float) -> None:
+        self.tokens = 0
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class RateLimiter:
+    """Outbound limiter: one TokenBucket per (provider, credential).
+
+    Installed as a `RateLimitTransport` on the shared provider clients, so
+    every Twitch/Kick call that reaches the network is budgeted without
+    changes at call sites. The credential
+    is the Authorization header (user or app token); unauthenticated calls such
+    as token exchanges share the provider's client-level bucket.
+    """
+
+    def __init__(self, limits: Dict[str, ProviderLimits], max_buckets: int = RATE_LIMIT_MAX_BUCKETS):
+        self.limits = limits
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.throttled: Dict[str, int] = defaultdict(int)
+        self.waits: Dict[Tuple[str, int], List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        return cls(
+            {
+                # Helix: 800 points per minute per token.
+                "twitch": ProviderLimits.from_env("twitch", 800, 60),
+                "kick": ProviderLimits.from_env("kick", 120, 60),
+            }
+        )
+
+    def bucket(self, provider: str, credential: str) -> TokenBucket:
+        key = (provider, credential)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.limits[provider])
+            if len(self._buckets) > self.max_buckets:
+                for old_key, old in list(self._buckets.items()):
+                    if not old.queued:
+                        del self._buckets[old_key]
+                        break
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    @staticmethod
+    def _credential(request: httpx.Request) -> str:
+        return request.headers.get("Authorization") or "client"
+
+    async def before(self, provider: str, request: httpx.Request) -> None:
+        priority = request_priority.get()
+        waited = await self.bucket(provider, self._credential(request)).acquire(priority)
+        self.requests[provider] += 1
+        stat = self.waits[(provider, priority)]
+        stat[0] += 1
+        stat[1] += waited
+        stat[2] = max(stat[2], waited)
+
+    async def after(self, provider: str, request: httpx.Request, response: httpx.Response) -> None:
+        bucket = self.bucket(provider, self._credential(request))
+        limit, remaining, reset_in = rate_headers(response.headers)
+        if response.status_code == 429:
+            self.throttled[provider] += 1
+            bucket.pause(reset_in if reset_in is not None else 1.0)
+        else:
+            bucket.update(limit, remaining, reset_in)
+
+    def stats(self) -> Dict:
+        providers = {}
+        for provider in self.limits:
+            waits = {}
+            for priority, name in PRIORITY_NAMES.items():
+                count, total, longest = self.waits.get((provider, priority), (0, 0.0, 0.0))
+                waits[name] = {
+                    "requests": count,
+                    "avgWaitMs": round(total / count * 1000, 2) if count else 0.0,
+                    "maxWaitMs": round(longest * 1000, 2),
+                }
+            providers[provider] = {
+                "requests": self.requests[provider],
+                "throttled": self.throttled[provider],
+                "queued": sum(b.queued for (p, _), b in self._buckets.items() if p == provider),
+                "wait": waits,
+            }
+        return {"buckets": len(self._buckets), "providers": providers}
+
+
+class RateLimitTransport(httpx.AsyncBaseTransport):
+    """Passes each request through the provider's rate limiter before sending it."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: RateLimiter, provider: str):
+        self.transport = transport
+        self.limiter = limiter
+        self.provider = provider
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self.limiter.before(self.provider, request)
+        response = await self.transport.handle_async_request(request)
+        await self.limiter.after(self.provider, request, response)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
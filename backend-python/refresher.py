@@ -0,0 +1,147 @@
+import asyncio
+import heapq
+import math
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+
+from batch_loader import loader_scope
+from db import read_async
+from store import refresh_streamers, stale_streamers
+from write_queue import write_async
+
+# provider -> coroutine taking [{"login", "provider_id"}] and returning metadata entries.
+Fetcher = Callable[[List[Dict]], Awaitable[List[Dict]]]
+
+STREAMER_REFRESH_INTERVAL = float(os.environ.get("STREAMER_REFRESH_INTERVAL", "60"))
+STREAMER_REFRESH_MIN_AGE = float(os.environ.get("STREAMER_REFRESH_MIN_AGE", "900"))
+# Floor for the popularity-scaled age: how often the most-followed streamers may be refreshed.
+STREAMER_REFRESH_HOT_AGE = float(os.environ.get("STREAMER_REFRESH_HOT_AGE", "120"))
+STREAMER_REFRESH_BUDGET = int(os.environ.get("STREAMER_REFRESH_BUDGET", "1000"))
+STREAMER_REFRESH_BATCH = 100
+
+
+class StreamerRefresher:
+    """Keeps shared Streamer metadata (followers, avatar, name) fresh.
+
+    Every `interval` seconds it loads the followed streamers that are due,
+    ranks them by staleness x popularity (number of follow links) and
+    refreshes the top `budget` in provider batches of 100. A streamer is due
+    after `min_age / sqrt(popularity)`, but never sooner than `hot_age`, so a
+    streamer with one follower waits `min_age` and popular ones refresh more
+    often. Work scales with unique streamers, not follows: each streamer is
+    fetched once per pass no matter how many users follow it, and hot ones win
+    the budget first. Streamers whose last refresh failed keep their old
+    metadata and report `stale(provider, login)` until a refresh succeeds;
+    `generation` moves whenever that set changes.
+    """
+
+    def __init__(
+        self,
+        fetchers: Dict[str, Fetcher],
+        interval: float = STREAMER_REFRESH_INTERVAL,
+        min_age: float = STREAMER_REFRESH_MIN_AGE,
+        hot_age: float = STREAMER_REFRESH_HOT_AGE,
+        budget: int = STREAMER_REFRESH_BUDGET,
+        batch_size: int = STREAMER_REFRESH_BATCH,
+    ):
+        self.fetchers = fetchers
+        self.interval = interval
+        self.min_age = timedelta(seconds=min_age)
+        self.hot_age = timedelta(seconds=min(hot_age, min_age))
+        self.budget = budget
+        self.batch_size = batch_size
+        self.passes = 0
+        self.refreshed = 0
+        self.changed = 0
+        self.failed_batches = 0
+        self.failed_passes = 0
+        self.backlog = 0
+        self.generation = 0
+        self._failed: Set[Tuple[str, str]] = set()
+
+    def max_age(self, popularity: int) -> timedelta:
+        return max(self.hot_age, self.min_age / math.sqrt(max(popularity, 1)))
+
+    def plan(self, candidates: List, now: datetime) -> Dict[str, List]:
+        def priority(row) -> float:
+            # Never-refreshed rows have no metadata yet, so they go first.
+            staleness = (now - row.refreshed_at).total_seconds() if row.refreshed_at else float("inf")
+            return staleness * row.popularity
+
+        due = [
+            r
+            for r in candidates
+            if r.provider in self.fetchers
+            and (r.refreshed_at is None or now - r.refreshed_at >= self.max_age(r.popularity))
+        ]
+        chosen = heapq.nlargest(self.budget, due, key=priority)
+        self.backlog = len(due) - len(chosen)
+        by_provider: Dict[str, List] = defaultdict(list)
+        for row in chosen:
+            by_provider[row.provider].append(row)
+        return by_provider
+
+    async def _fetch_batch(self, provider: str, rows: List) -> Tuple[List[Dict], List[int]]:
+        try:
+            entries = await self.fetchers[provider]([{"login": r.login, "provider_id": r.provider_id} for r in rows])
+        except Exception:
+            # Leave refreshed_at untouched so the batch is retried next pass.
+            self.failed_batches += 1
+            self._mark(provider, rows, failed=True)
+            return [], []
+        self._mark(provider, rows, failed=False)
+        return entries, [r.id for r in rows]
+
+    def _mark(self, provider: str, rows: List, failed: bool) -> None:
+        keys = {(provider, r.login) for r in rows}
+        changed = not keys <= self._failed if failed else bool(keys & self._failed)
+        if failed:
+            self._failed |= keys
+        else:
+            self._failed -= keys
+        if changed:
+            self.generation += 1
+
+    def stale(self, provider: str, login: str) -> bool:
+        return (provider, login) in self._failed
+
+    async def run_once(self) -> None:
+        now = datetime.utcnow()
+        # Everything past the shortest possible age; `plan` applies each row's own.
+        candidates = await read_async(stale_streamers, now - self.hot_age)
+        for provider, rows in self.plan(candidates, now).items():
+            with loader_scope():
+                fetched = await asyncio.gather(
+                    *(
+                        self._fetch_batch(provider, rows[i : i + self.batch_size])
+                        for i in range(0, len(rows), self.batch_size)
+                    )
+                )
+            entries = [entry for batch, _ in fetched for entry in batch]
+            ids = [i for _, batch_ids in fetched for i in batch_ids]
+            if ids:
+                # One bulk write per provider per pass.
+                self.changed += await write_async(refresh_streamers, provider, entries, ids)
+                self.refreshed += len(ids)
+        self.passes += 1
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception:
+                self.failed_passes += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "passes": self.passes,
+            "refreshed": self.refreshed,
+            "changed": self.changed,
+            "failedBatches": self.failed_batches,
+            "failedPasses": self.failed_passes,
+            "backlog": self.backlog,
+            "stale": len(self._failed),
+        }
@@ -0,0 +1,85 @@
+import gzip
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Optional
+
+from fastapi import Response
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison, as RFC 9110 requires for If-None-Match."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == tag for candidate in if_none_match.split(","))
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    if not accept_encoding:
+        return False
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def not_modified(etag: str, headers: Dict[str, str] | None = None) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
+
+
+@dataclass
+class CachedBody:
+    etag: str
+    body: bytes
+    gzipped: Optional[bytes] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def response(self, accept_encoding: str | None, media_type: str = "application/json") -> Response:
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding", **self.headers}
+        if self.gzipped is not None and accepts_gzip(accept_encoding):
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=self.gzipped, media_type=media_type, headers=headers)
+        return Response(content=self.body, media_type=media_type, headers=headers)
+
+
+class SerializedCache:
+    """Small LRU of already-encoded response bodies (plus a gzip copy when worth it)."""
+
+    def __init__(self, max_entries: int = 256, gzip_min_size: int = 1024):
+        self.max_entries = max_entries
+        self.gzip_min_size = gzip_min_size
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, etag: str, body: bytes, headers: Dict[str, str] | None = None) -> CachedBody:
+        gzipped = gzip.compress(body, compresslevel=6) if len(body) >= self.gzip_min_size else None
+        entry = CachedBody(etag=etag, body=body, gzipped=gzipped, headers=headers or {})
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,153 @@
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel, Field
+from sqlalchemy import delete, func, tuple_
+from sqlmodel import Session, select
+
+from models import RewardRecord
+from pagination import InvalidCursor, decode_cursor as _decode, encode_cursor as _encode
+from response_cache import SerializedCache
+from store import bump_version, read_version
+
+CATALOG_NAME = "rewards"
+SORT_COLUMNS = {"created": "created_at", "amount": "amount"}
+MAX_PAGE_SIZE = 200
+
+
+class RewardCreate(BaseModel):
+    title: str = Field(..., min_length=1, max_length=100)
+    description: str | None = Field(default=None, max_length=500)
+    token: str = Field(default="USDC", max_length=10)
+    amount: float = Field(..., gt=0)
+
+
+class Reward(RewardCreate):
+    id: UUID
+
+
+def _to_reward(record: RewardRecord) -> Reward:
+    return Reward(
+        id=record.id,
+        title=record.title,
+        description=record.description,
+        token=record.token,
+        amount=record.amount,
+    )
+
+
+def encode_cursor(sort: str, record: RewardRecord) -> str:
+    value = getattr(record, SORT_COLUMNS[sort.lstrip("-")])
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return _encode([sort, value, record.id.hex])
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[object, UUID]:
+    cursor_sort, value, reward_id = _decode(cursor, 3)
+    if cursor_sort != sort:
+        raise InvalidCursor("Cursor was issued for a different sort")
+    try:
+        if SORT_COLUMNS[sort.lstrip("-")] == "created_at":
+            value = datetime.fromisoformat(value)
+        else:
+            value = float(value)
+        return value, UUID(reward_id)
+    except (ValueError, TypeError, AttributeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+
+
+class RewardCatalog:
+    """Reward storage: the `reward` table plus a read-through id -> Reward map.
+
+    Point lookups hit the map (or one primary-key probe on a miss); listing
+    is a keyset query over a composite index, never a full scan. Every write
+    bumps the shared `rewards` version; a worker that sees a new version drops
+    its map and its pre-serialized list responses.
+    """
+
+    def __init__(self):
+        self._by_id: Dict[UUID, Reward] = {}
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self.responses = SerializedCache()
+
+    def version(self, session: Session) -> int:
+        value = read_version(session, CATALOG_NAME)
+        if value != self._version:
+            with self._lock:
+                if value != self._version:
+                    self._by_id.clear()
+                    self.responses.clear()
+                    self._version = value
+        return value
+
+    def _bump(self, session: Session) -> None:
+        bump_version(session, CATALOG_NAME)
+
+    def seed(self, session: Session, defaults: List[RewardCreate]) -> None:
+        if session.exec(select(func.count()).select_from(RewardRecord)).one() == 0:
+            for payload in defaults:
+                session.add(RewardRecord(id=uuid4(), **payload.model_dump()))
+            self._bump(session)
+
+    def get(self, session: Session, reward_id: UUID) -> Optional[Reward]:
+        self.version(session)
+        reward = self._by_id.get(reward_id)
+        if reward is not None:
+            return reward
+        record = session.get(RewardRecord, reward_id)
+        if record is None:
+            return None
+        reward = _to_reward(record)
+        with self._lock:
+            self._by_id[reward_id] = reward
+        return reward
+
+    def create(self, session: Session, payload: RewardCreate) -> Reward:
+        record = RewardRecord(id=uuid4(), **payload.model_dump())
+        session.add(record)
+        session.flush()
+        self._bump(session)
+        return _to_reward(record)
+
+    def delete(self, session: Session, reward_id: UUID) -> bool:
+        deleted = session.exec(delete(RewardRecord).where(RewardRecord.id == reward_id)).rowcount
+        with self._lock:
+            self._by_id.pop(reward_id, None)
+        if deleted:
+            self._bump(session)
+        return deleted > 0
+
+    def page(
+        self,
+        session: Session,
+        token: str | None = None,
+        min_amount: float | None = None,
+        max_amount: float | None = None,
+        sort: str = "created",
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> Tuple[List[Reward], Optional[str]]:
+        column = getattr(RewardRecord, SORT_COLUMNS[sort.lstrip("-")])
+        descending = sort.startswith("-")
+        query = select(RewardRecord)
+        if token:
+            query = query.where(RewardRecord.token == token)
+        if min_amount is not None:
+            query = query.where(RewardRecord.amount >= min_amount)
+        if max_amount is not None:
+            query = query.where(RewardRecord.amount <= max_amount)
+        if cursor:
+            value, last_id = decode_cursor(cursor, sort)
+            key = tuple_(column, RewardRecord.id)
+            query = query.where(key < tuple_(value, last_id) if descending else key > tuple_(value, last_id))
+        if descending:
+            query = query.order_by(column.desc(), RewardRecord.id.desc())
+        else:
+            query = query.order_by(column, RewardRecord.id)
+        records = session.exec(query.limit(limit + 1)).all()
+        next_cursor = encode_cursor(sort, records[limit - 1]) if len(records) > limit else None
+        return [_to_reward(r) for r in records[:limit]], next_cursor
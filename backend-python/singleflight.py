@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls into one.
+
+    Callers pass a key (provider, endpoint, credential, params) and a
+    coroutine function; while a call for that key and function is in flight,
+    later callers await the same task and get its result or exception. The
+    function is part of the identity, so two fetchers that hit the same
+    endpoint but shape the result differently never share a call. Nothing is kept
+    after the call finishes, so this only removes duplicates that overlap in
+    time. Results are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[T]], *args: Any) -> T:
+        key = (fn, key)
+        task = self._inflight.get(key)
+        # A finished task may linger until its done-callbacks run; never reuse it.
+        if task is None or task.done():
+            self.calls += 1
+            task = asyncio.create_task(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        else:
+            self.shared += 1
+        # One caller giving up must not cancel the call for the others.
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller was cancelled.
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "shared": self.shared, "inflight": len(self._inflight)}
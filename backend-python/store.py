@@ -0,0 +1,359 @@
+import hashlib
+import json
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, func, insert, or_, tuple_, update
+from sqlmodel import Session, select
+
+from db import upsert
+from models import AuthToken, CatalogVersion, Follow, FollowSyncState, Streamer, User
+from pagination import InvalidCursor, decode_cursor, encode_cursor
+
+IDENTITY_COLUMNS = {"twitch": "twitch_id", "kick": "kick_id"}
+STREAMER_FIELDS = ("provider_id", "display_name", "followers", "avatar")
+# Public field name -> column, in response order.
+FOLLOW_API_FIELDS = {
+    "platform": Follow.provider,
+    "login": Follow.login,
+    "display_name": Streamer.display_name,
+    "followers": Streamer.followers,
+    "avatar": Streamer.avatar,
+}
+# Bumped whenever shared streamer metadata changes; part of every follows ETag.
+STREAMERS_VERSION = "streamers"
+# Keeps IN (...) lists well under SQLite's bound-parameter limit.
+IN_CHUNK = 500
+
+follow_churn: Counter = Counter()
+
+
+@dataclass
+class FollowSync:
+    added: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    streamers: int = 0
+
+
+def read_version(session: Session, name: str) -> int:
+    record = session.get(CatalogVersion, name)
+    return record.value if record else 0
+
+
+def bump_version(session: Session, name: str) -> None:
+    table = CatalogVersion.__table__
+    stmt = upsert(table).values(name=name, value=1)
+    session.exec(stmt.on_conflict_do_update(index_elements=["name"], set_={"value": table.c.value + 1}))
+
+
+def find_user(session: Session, user_id: int | None) -> User | None:
+    query = select(User).where(User.id == user_id) if user_id else select(User)
+    return session.exec(query).first()
+
+
+def page_follows(
+    session: Session,
+    user_id: int,
+    platform: str | None = None,
+    limit: int = 100,
+    cursor: str | None = None,
+    fields: List[str] | None = None,
+    extra: Callable[[str, str], Dict] | None = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    """One keyset page of a user's follows ordered by (provider, login), as plain dicts.
+
+    `extra(provider, login)`, if given, is merged into each item (e.g. live status).
+    """
+    fields = list(FOLLOW_API_FIELDS) if fields is None else fields
+    columns = {"provider": Follow.provider, "login": Follow.login, **{f: FOLLOW_API_FIELDS[f] for f in fields}}
+    query = select(*(column.label(name) for name, column in columns.items())).where(Follow.user_id == user_id)
+    if any(FOLLOW_API_FIELDS[f].class_ is Streamer for f in fields):
+        query = query.join(Streamer, Streamer.id == Follow.streamer_id)
+    after = decode_cursor(cursor, 2) if cursor else None
+    if after and not all(isinstance(value, str) for value in after):
+        raise InvalidCursor("Malformed cursor")
+    if platform:
+        # Provider is fixed, so seek on login alone to keep the index order.
+        query = query.where(Follow.provider == platform)
+        if after:
+            if after[0] != platform:
+                raise InvalidCursor("Cursor was issued for a different platform")
+            query = query.where(Follow.login > after[1])
+        query = query.order_by(Follow.login)
+    else:
+        if after:
+            query = query.where(tuple_(Follow.provider, Follow.login) > tuple_(*after))
+        query = query.order_by(Follow.provider, Follow.login)
+    rows = session.exec(query.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor([last.provider, last.login])
+    items = [{f: getattr(row, f) for f in fields} for row in rows[:limit]]
+    if extra:
+        for item, row in zip(items, rows):
+            item.update(extra(row.provider, row.login))
+    return items, next_cursor
+
+
+def upsert_user(session: Session, provider: str, provider_id: str | None, profile: Dict) -> int:
+    """Insert or update the user owning `provider_id`; empty profile fields keep stored values."""
+    column = IDENTITY_COLUMNS[provider]
+    table = User.__table__
+    stmt = upsert(table).values({column: provider_id or None, **profile})
+    if provider_id:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[column],
+            set_={key: func.coalesce(stmt.excluded[key], table.c[key]) for key in profile},
+        )
+    return session.exec(stmt.returning(table.c.id)).scalar_one()
+
+
+def _token_values(token_data: Dict) -> Dict:
+    expires_in = token_data.get("expires_in")
+    return {
+        "access_token": token_data.get("access_token", ""),
+        "refresh_token": token_data.get("refresh_token"),
+        "token_type": token_data.get("token_type"),
+        "expires_at": datetime.utcnow() + timedelta(seconds=expires_in) if expires_in else None,
+    }
+
+
+def upsert_token(session: Session, user_id: int, provider: str, token_data: Dict) -> None:
+    values = _token_values(token_data)
+    stmt = upsert(AuthToken.__table__).values(user_id=user_id, provider=provider, **values)
+    session.exec(stmt.on_conflict_do_update(index_elements=["user_id", "provider"], set_=values))
+
+
+def get_token(session: Session, user_id: int, provider: str) -> AuthToken | None:
+    return session.exec(
+        select(AuthToken).where(AuthToken.user_id == user_id, AuthToken.provider == provider)
+    ).first()
+
+
+def tokens_expiring(session: Session, before: datetime) -> List:
+    """Refreshable tokens whose expiry falls before `before` (including already expired ones)."""
+    return session.exec(
+        select(AuthToken.user_id, AuthToken.provider, AuthToken.expires_at).where(
+            AuthToken.expires_at < before, AuthToken.refresh_token.is_not(None)
+        )
+    ).all()
+
+
+def replace_token(session: Session, user_id: int, provider: str, refresh_token: str, token_data: Dict) -> bool:
+    """Store a refreshed token only if the row still holds `refresh_token` (the grant it was exchanged for).
+
+    Returns False when a login or another worker replaced the token first; that newer token is kept.
+    """
+    result = session.exec(
+        update(AuthToken)
+        .where(
+            AuthToken.user_id == user_id,
+            AuthToken.provider == provider,
+            AuthToken.refresh_token == refresh_token,
+        )
+        .values(_token_values(token_data))
+    )
+    return result.rowcount > 0
+
+
+def clear_refresh_token(session: Session, user_id: int, provider: str, refresh_token: str) -> bool:
+    """Drop a rejected refresh token, unless it has already been replaced by a newer one."""
+    result = session.exec(
+        update(AuthToken)
+        .where(
+            AuthToken.user_id == user_id,
+            AuthToken.provider == provider,
+            AuthToken.refresh_token == refresh_token,
+        )
+        .values(refresh_token=None)
+    )
+    return result.rowcount > 0
+
+
+def _streamer_row(entry: Dict) -> Dict:
+    return {field: entry.get(field) for field in STREAMER_FIELDS}
+
+
+def _streamer_ids(session: Session, provider: str, logins: List[str], columns=()) -> List:
+    rows = []
+    for i in range(0, len(logins), IN_CHUNK):
+        rows += session.exec(
+            select(Streamer.id, Streamer.login, *columns).where(
+                Streamer.provider == provider, Streamer.login.in_(logins[i : i + IN_CHUNK])
+            )
+        ).all()
+    return rows
+
+
+def upsert_streamers(session: Session, provider: str, entries: List[Dict]) -> Tuple[Dict[str, int], int]:
+    """Ensure a Streamer row per login and return ({login: id}, rows whose metadata changed).
+
+    Metadata is written once per streamer, and only when it differs; None
+    fields mean "unknown" and keep the stored value.
+    """
+    incoming = {e["login"]: _streamer_row(e) for e in entries if e.get("login")}
+    ids: Dict[str, int] = {}
+    changed: List[Dict] = []
+    columns = [getattr(Streamer, field) for field in STREAMER_FIELDS]
+    for row in _streamer_ids(session, provider, list(incoming), columns):
+        ids[row.login] = row.id
+        wanted = incoming[row.login]
+        if any(value is not None and value != getattr(row, field) for field, value in wanted.items()):
+            changed.append({"b_id": row.id, **{f"b_{k}": v for k, v in wanted.items()}})
+
+    if changed:
+        table = Streamer.__table__
+        session.exec(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values({field: func.coalesce(bindparam(f"b_{field}"), table.c[field]) for field in STREAMER_FIELDS}),
+            params=changed,
+        )
+        bump_version(session, STREAMERS_VERSION)
+    new = [login for login in incoming if login not in ids]
+    if new:
+        stmt = upsert(Streamer.__table__).on_conflict_do_nothing(index_elements=["provider", "login"])
+        session.exec(
+            stmt,
+            params=[
+                {
+                    "provider": provider,
+                    "login": login,
+                    **incoming[login],
+                    "display_name": incoming[login]["display_name"] or login,
+                }
+                for login in new
+            ],
+        )
+        ids.update({row.login: row.id for row in _streamer_ids(session, provider, new)})
+    return ids, len(changed) + len(new)
+
+
+def sync_follows(session: Session, user_id: int, provider: str, entries: List[Dict]) -> FollowSync:
+    """Bring a user's follows for `provider` in line with `entries`, keyed by login.
+
+    Streamer metadata goes to the shared Streamer rows; the user's follow
+    links are diffed so only new logins are inserted and missing ones deleted.
+    """
+    streamer_ids, written = upsert_streamers(session, provider, entries)
+    incoming = dict(streamer_ids)
+    existing = session.exec(
+        select(Follow.id, Follow.login).where(Follow.user_id == user_id, Follow.provider == provider)
+    ).all()
+
+    result = FollowSync(streamers=written)
+    removed_ids: List[int] = []
+    for row in existing:
+        if incoming.pop(row.login, None) is None:
+            removed_ids.append(row.id)
+        else:
+            result.unchanged += 1
+
+    for i in range(0, len(removed_ids), IN_CHUNK):
+        session.exec(delete(Follow).where(Follow.id.in_(removed_ids[i : i + IN_CHUNK])))
+    if incoming:
+        session.exec(
+            insert(Follow.__table__),
+            params=[
+                {"user_id": user_id, "provider": provider, "login": login, "streamer_id": streamer_id}
+                for login, streamer_id in incoming.items()
+            ],
+        )
+
+    result.added = len(incoming)
+    result.removed = len(removed_ids)
+    if result.added or result.removed:
+        users = User.__table__
+        session.exec(
+            update(users).where(users.c.id == user_id).values(follows_version=users.c.follows_version + 1)
+        )
+    follow_churn.update({f"{provider}_{k}": v for k, v in asdict(result).items()})
+    return result
+
+
+def followed_streamers(session: Session) -> List:
+    """Every streamer at least one user follows."""
+    return session.exec(
+        select(Streamer.provider, Streamer.login, Streamer.provider_id)
+        .where(select(Follow.id).where(Follow.streamer_id == Streamer.id).exists())
+    ).all()
+
+
+def stale_streamers(session: Session, before: datetime) -> List:
+    """Followed streamers not refreshed since `before`, with their follower-link count."""
+    popularity = func.count(Follow.id).label("popularity")
+    return session.exec(
+        select(Streamer.id, Streamer.provider, Streamer.login, Streamer.provider_id, Streamer.refreshed_at, popularity)
+        .join(Follow, Follow.streamer_id == Streamer.id)
+        .where(or_(Streamer.refreshed_at.is_(None), Streamer.refreshed_at < before))
+        .group_by(Streamer.id)
+    ).all()
+
+
+def refresh_streamers(session: Session, provider: str, entries: List[Dict], ids: List[int]) -> int:
+    """Write refreshed metadata and stamp every attempted streamer; returns rows changed."""
+    _, changed = upsert_streamers(session, provider, entries)
+    now = datetime.utcnow()
+    for i in range(0, len(ids), IN_CHUNK):
+        session.exec(update(Streamer).where(Streamer.id.in_(ids[i : i + IN_CHUNK])).values(refreshed_at=now))
+    return changed
+
+
+def follow_watermark(session: Session, user_id: int, provider: str) -> FollowSyncState | None:
+    return session.get(FollowSyncState, (user_id, provider))
+
+
+def _fingerprint(entries: List[Dict]) -> str:
+    rows = sorted(([e.get("login", ""), *(e.get(f) for f in STREAMER_FIELDS)] for e in entries), key=lambda r: r[0])
+    return hashlib.sha1(json.dumps(rows, default=str).encode()).hexdigest()
+
+
+def resync_follows(session: Session, user_id: int, provider: str, entries: List[Dict]) -> FollowSync | None:
+    """Apply a fetched follow list unless it matches the last synced one.
+
+    Either way the watermark moves to now; returns None when nothing was diffed.
+    """
+    fingerprint = _fingerprint(entries)
+    state = follow_watermark(session, user_id, provider)
+    result = None
+    if state is None or state.fingerprint != fingerprint:
+        result = sync_follows(session, user_id, provider, entries)
+    else:
+        follow_churn[f"{provider}_skipped"] += 1
+    values = {"synced_at": datetime.utcnow(), "fingerprint": fingerprint}
+    stmt = upsert(FollowSyncState.__table__).values(user_id=user_id, provider=provider, **values)
+    session.exec(stmt.on_conflict_do_update(index_elements=["user_id", "provider"], set_=values))
+    return result
+
+
+def save_login(
+    session: Session,
+    provider: str,
+    provider_id: str | None,
+    profile: Dict,
+    token_data: Dict,
+    follows: List[Dict] | None = None,
+) -> int:
+    """Persist one OAuth login (user, token, follows); the caller owns the transaction.
+
+    `follows=None` leaves stored follows untouched (they are synced separately).
+    """
+    user_id = upsert_user(session, provider, provider_id, profile)
+    upsert_token(session, user_id, provider, token_data)
+    if follows is not None:
+        sync_follows(session, user_id, provider, follows)
+    return user_id
+
+
+def save_steam_link(session: Session, user_id: int | None, link: str | None) -> Dict:
+    db_user = find_user(session, user_id)
+    if not db_user:
+        db_user = User()
+        session.add(db_user)
+    db_user.steam_trade_link = link
+    session.flush()
+    return {"steamTradeLink": db_user.steam_trade_link, "userId": db_user.id}
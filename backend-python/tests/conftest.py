@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Modules live flat in backend-python/; point the engine at a throwaway DB before `db` is imported.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DB_URL", f"sqlite:///{tempfile.mkdtemp()}/test.sqlite3")
+
+import pytest  # noqa: E402
+
+from db import init_db  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    init_db()
@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+from migrations import MIGRATIONS
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+# The schema the API shipped with before migrations existed (user_version 0).
+BASELINE_SCHEMA = """
+CREATE TABLE user (
+    id INTEGER NOT NULL PRIMARY KEY, kick_id VARCHAR, twitch_id VARCHAR, email VARCHAR,
+    display_name VARCHAR, steam_trade_link VARCHAR, avatar_url VARCHAR
+);
+CREATE INDEX ix_user_kick_id ON user (kick_id);
+CREATE INDEX ix_user_twitch_id ON user (twitch_id);
+CREATE TABLE authtoken (
+    id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER REFERENCES user (id), provider VARCHAR NOT NULL,
+    access_token VARCHAR NOT NULL, refresh_token VARCHAR, expires_at DATETIME, token_type VARCHAR
+);
+CREATE TABLE follow (
+    id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER REFERENCES user (id), provider VARCHAR NOT NULL,
+    login VARCHAR NOT NULL, display_name VARCHAR NOT NULL, followers INTEGER, avatar VARCHAR
+);
+INSERT INTO user (id, kick_id, display_name) VALUES (1, 'k1', 'one'), (2, 'k1', 'duplicate');
+INSERT INTO authtoken (user_id, provider, access_token) VALUES (1, 'kick', 'old'), (1, 'kick', 'new');
+INSERT INTO follow (user_id, provider, login, display_name, followers) VALUES
+    (1, 'kick', 'xqc', 'xQc', 10), (1, 'kick', 'xqc', 'xQc', 11), (2, 'kick', 'xqc', 'xQc', 12);
+"""
+
+
+def start_workers(path: Path, count: int = 4):
+    env = {**os.environ, "DB_URL": f"sqlite:///{path}"}
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", "import db; db.init_db()"], cwd=BACKEND, env=env, stderr=subprocess.PIPE
+        )
+        for _ in range(count)
+    ]
+    errors = [worker.communicate()[1].decode() for worker in workers]
+    assert [worker.returncode for worker in workers] == [0] * count, errors
+
+
+def columns(conn: sqlite3.Connection, table: str):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+
+
+def assert_current_schema(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"user", "authtoken", "follow", "streamer", "follow_sync_state", "reward", "catalog_version"} <= tables
+    assert "follows_version" in columns(conn, "user")
+    assert columns(conn, "follow") == {"id", "user_id", "provider", "login", "streamer_id"}
+    assert "refreshed_at" in columns(conn, "streamer")
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+    return conn
+
+
+def test_concurrent_workers_migrate_a_baseline_database(tmp_path):
+    path = tmp_path / "baseline.sqlite3"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+
+    start_workers(path)
+
+    conn = assert_current_schema(path)
+    assert conn.execute("SELECT kick_id FROM user ORDER BY id").fetchall() == [("k1",), (None,)]
+    assert conn.execute("SELECT access_token FROM authtoken").fetchall() == [("new",)]
+    assert conn.execute("SELECT user_id, login FROM follow ORDER BY user_id").fetchall() == [(1, "xqc"), (2, "xqc")]
+    assert conn.execute("SELECT display_name, followers FROM streamer").fetchall() == [("xQc", 12)]
+
+
+def test_concurrent_workers_create_and_rerun_migrations(tmp_path):
+    path = tmp_path / "fresh.sqlite3"
+    start_workers(path)
+    assert_current_schema(path).close()
+
+    # Re-running every step on a schema that already has it must be harmless.
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA user_version = 0")
+    start_workers(path)
+    assert_current_schema(path).close()
@@ -0,0 +1,99 @@
+import asyncio
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from http_cache import CachedResponse, CacheTransport, DiskTier, ResponseCache
+
+URL = "https://provider.test/channels"
+
+
+def entry(body: bytes = b"{}") -> CachedResponse:
+    return CachedResponse(200, [("content-type", "application/json")], body, expires_at=0.0)
+
+
+def test_concurrent_disk_stores_of_one_key_do_not_collide(tmp_path):
+    disk = DiskTier(str(tmp_path), max_bytes=1 << 20)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: disk.put("key", entry(str(i).encode())), range(200)))
+
+    assert [p.name for p in tmp_path.iterdir()] == ["key.entry"]
+    assert disk.get("key").body.isdigit()
+
+
+def test_disk_errors_are_cache_misses(tmp_path):
+    cache = ResponseCache(max_entries=1, disk=DiskTier(str(tmp_path / "cache"), max_bytes=1 << 20))
+    shutil.rmtree(tmp_path / "cache")
+
+    async def store_and_load():
+        await cache.put("a", entry())
+        await cache.put("b", entry())
+        return await cache.get("a")
+
+    assert asyncio.run(store_and_load()) is None
+    assert cache.stats()["diskErrors"] == 2
+
+
+class Origin:
+    """Provider stand-in: answers every GET with `headers`, or 304 when `not_modified` is set."""
+
+    def __init__(self, **headers: str):
+        self.headers = headers
+        self.requests = []
+        self.not_modified = False
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.not_modified:
+            return httpx.Response(304, headers={"Cache-Control": "max-age=60", "ETag": '"v1"'})
+        return httpx.Response(200, headers={"ETag": '"v1"', **self.headers}, json={"n": len(self.requests)})
+
+
+def get(origin: Origin, cache: ResponseCache, **headers: str) -> dict:
+    """GET `URL` through a CacheTransport over `origin`; returns the JSON body."""
+
+    async def run():
+        transport = CacheTransport(httpx.MockTransport(origin), cache)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return (await client.get(URL, headers=headers)).json()
+
+    return asyncio.run(run())
+
+
+def test_fresh_entry_is_served_without_a_network_call():
+    origin, cache = Origin(**{"Cache-Control": "max-age=60"}), ResponseCache()
+
+    assert [get(origin, cache), get(origin, cache)] == [{"n": 1}, {"n": 1}]
+    assert len(origin.requests) == 1
+
+
+def test_stale_entry_is_revalidated_and_304_refreshes_it():
+    origin, cache = Origin(**{"Cache-Control": "no-cache"}), ResponseCache()
+    get(origin, cache)
+    origin.not_modified = True
+
+    # The 304 returns the stored body and makes the entry fresh for its new max-age.
+    assert [get(origin, cache), get(origin, cache)] == [{"n": 1}, {"n": 1}]
+    assert len(origin.requests) == 2
+    assert origin.requests[1].headers["If-None-Match"] == '"v1"'
+    assert cache.revalidated == 1
+
+
+@pytest.mark.parametrize("headers", [{"Cache-Control": "no-store"}, {"Cache-Control": "max-age=60", "Vary": "*"}])
+def test_uncacheable_responses_are_never_stored(headers):
+    origin, cache = Origin(**headers), ResponseCache()
+
+    assert [get(origin, cache), get(origin, cache)] == [{"n": 1}, {"n": 2}]
+    assert "If-None-Match" not in origin.requests[1].headers
+
+
+def test_entries_are_scoped_to_the_authorization_header():
+    origin, cache = Origin(**{"Cache-Control": "max-age=60"}), ResponseCache()
+
+    bodies = [get(origin, cache, Authorization=f"Bearer {token}") for token in ("a", "b", "a")]
+
+    assert bodies == [{"n": 1}, {"n": 2}, {"n": 1}]
+    assert len(origin.requests) == 2
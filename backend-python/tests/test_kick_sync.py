@@ -0,0 +1,132 @@
+import asyncio
+
+import httpx
+
+from db import read
+from http_clients import ProviderClients
+from kick_sync import KICK_CHANNELS_BATCH, KickFollowSync
+from store import follow_watermark, resync_follows, upsert_user
+from write_queue import write
+
+FOLLOWS = 230
+PAGE_SIZE = 100
+
+
+class MockKick:
+    """Local Kick stand-in: page-numbered follows and channels by slug, tracking in-flight requests."""
+
+    def __init__(self, follows: int = FOLLOWS, ignore_page: bool = False):
+        self.follows = follows
+        self.ignore_page = ignore_page
+        self.requests = []
+        self.inflight = 0
+        self.max_inflight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            await asyncio.sleep(0.01)
+            if request.url.path == "/follows":
+                page, limit = int(request.url.params["page"]), int(request.url.params["limit"])
+                if self.ignore_page:
+                    page = 1
+                ids = range((page - 1) * limit, min(page * limit, self.follows))
+                data = [{"slug": f"k{i}", "username": f"K{i}"} for i in ids]
+                return httpx.Response(200, json={"data": data})
+            if request.url.path == "/channels":
+                slugs = request.url.params.get_list("slug")
+                data = [{"slug": s, "broadcaster_user_id": int(s[1:])} for s in slugs]
+                return httpx.Response(200, json={"data": data})
+            return httpx.Response(404)
+        finally:
+            self.inflight -= 1
+
+    def paths(self, path: str):
+        return [r for r in self.requests if r.url.path == path]
+
+
+def kick_sync(mock: MockKick, **options) -> KickFollowSync:
+    clients = ProviderClients(transport=httpx.MockTransport(mock))
+    return KickFollowSync(
+        clients,
+        "client-id",
+        follows_url="https://kick.test/follows",
+        channels_url="https://kick.test/channels",
+        concurrency=4,
+        page_size=PAGE_SIZE,
+        **options,
+    )
+
+
+def test_fetch_follows_pages_concurrently_and_stops_at_short_page():
+    mock = MockKick()
+    entries = asyncio.run(kick_sync(mock).fetch_follows("user-token"))
+
+    assert len(entries) == FOLLOWS
+    # One window of `concurrency` pages; page 3 is short, so no second window.
+    assert sorted(int(r.url.params["page"]) for r in mock.paths("/follows")) == [1, 2, 3, 4]
+    assert mock.max_inflight >= 4
+    assert {e["login"]: e["provider_id"] for e in entries}["k7"] == "7"
+
+
+def test_fetch_follows_stops_when_pages_repeat():
+    mock = MockKick(follows=10 * PAGE_SIZE, ignore_page=True)
+    entries = asyncio.run(kick_sync(mock).fetch_follows("user-token"))
+
+    # Every page is page 1 again; the first window adds logins, the second adds none.
+    assert len(entries) == PAGE_SIZE
+    assert len(mock.paths("/follows")) == 8
+
+
+def test_fetch_follows_stops_at_max_pages():
+    mock = MockKick(follows=10**6)
+    entries = asyncio.run(kick_sync(mock, max_pages=6).fetch_follows("user-token"))
+
+    assert len(entries) == 6 * PAGE_SIZE
+    assert sorted(int(r.url.params["page"]) for r in mock.paths("/follows")) == [1, 2, 3, 4, 5, 6]
+
+
+def test_channel_enrichment_batches_slugs_by_50():
+    mock = MockKick()
+    asyncio.run(kick_sync(mock).fetch_follows("user-token"))
+
+    batches = [r.url.params.get_list("slug") for r in mock.paths("/channels")]
+    assert all(len(slugs) <= KICK_CHANNELS_BATCH for slugs in batches)
+    assert len(batches) == -(-FOLLOWS // KICK_CHANNELS_BATCH)
+    assert sorted(s for slugs in batches for s in slugs) == sorted(f"k{i}" for i in range(FOLLOWS))
+
+
+def test_resync_skips_diff_when_fingerprint_matches():
+    user_id = write(upsert_user, "kick", "kick-resync", {"display_name": "resync"})
+    entries = [{"login": f"k{i}", "display_name": f"K{i}", "provider_id": str(i)} for i in range(3)]
+
+    first = write(resync_follows, user_id, "kick", entries)
+    watermark = read(follow_watermark, user_id, "kick")
+    again = write(resync_follows, user_id, "kick", list(reversed(entries)))
+    moved = read(follow_watermark, user_id, "kick")
+    changed = write(resync_follows, user_id, "kick", entries[:2])
+
+    assert first is not None and first.added == 3
+    # Same follows in another order: no diff, but the watermark still moves.
+    assert again is None
+    assert moved.fingerprint == watermark.fingerprint
+    assert moved.synced_at >= watermark.synced_at
+    assert changed is not None and changed.removed == 1
+
+
+def test_refresh_follows_skips_fetch_inside_resync_interval():
+    import main
+
+    user_id = write(upsert_user, "kick", "kick-watermark", {"display_name": "watermark"})
+    write(resync_follows, user_id, "kick", [{"login": "k1"}])
+    fetched = []
+
+    async def fetch():
+        fetched.append(True)
+        return []
+
+    asyncio.run(main.refresh_follows(user_id, "kick", fetch))
+
+    assert fetched == []
@@ -0,0 +1,31 @@
+import asyncio
+
+from oauth_state import SQLiteStateStore
+
+
+def test_sqlite_store_caps_entries_on_put(tmp_path):
+    store = SQLiteStateStore(str(tmp_path / "state.sqlite3"), max_entries=5)
+    for i in range(8):
+        store.put(f"s{i}", verifier=f"v{i}")
+
+    assert store.size() == 5
+    assert store.stats()["evicted"] == 3
+    assert store.pop("s0") is None
+    assert store.pop("s7").verifier == "v7"
+    store.close()
+
+
+def test_sweeper_drops_expired_states(tmp_path):
+    store = SQLiteStateStore(str(tmp_path / "state.sqlite3"), ttl=0.0)
+    store.put("old")
+
+    async def sweep_once():
+        task = asyncio.create_task(store.run_sweeper(0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(sweep_once())
+
+    assert store.size() == 0
+    assert store.stats()["expired"] == 1
+    store.close()
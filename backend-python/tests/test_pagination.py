@@ -0,0 +1,37 @@
+import pytest
+from sqlmodel import Session
+
+from db import engine, read
+from pagination import InvalidCursor, encode_cursor
+from store import page_follows, resync_follows, upsert_user
+from write_queue import write
+
+
+@pytest.mark.parametrize("platform", [None, "twitch"])
+@pytest.mark.parametrize("after", [["twitch", {"a": 1}], [1, "login"], ["twitch", None]])
+def test_follow_cursor_with_non_string_values_is_rejected(platform, after):
+    with pytest.raises(InvalidCursor):
+        read(page_follows, 1, platform, 100, encode_cursor(after))
+
+
+def test_follows_etag_tracks_returned_live_values_not_process_counters(monkeypatch):
+    import main
+
+    user_id = write(upsert_user, "kick", "kick-etag", {"display_name": "etag"})
+    write(resync_follows, user_id, "kick", [{"login": "etag-live"}])
+
+    def following(if_none_match=None):
+        with Session(engine) as session:
+            return main.get_following(user_id, None, None, 100, None, if_none_match, session)
+
+    def etag():
+        return following().headers["ETag"]
+
+    offline = etag()
+    # Another worker's counters differ; the same data must still validate.
+    monkeypatch.setattr(main.live_status, "generation", main.live_status.generation + 7)
+    assert etag() == offline
+    monkeypatch.setitem(main.live_status._live, ("kick", "etag-live"), {"viewers": 3})
+    live = etag()
+    assert live != offline
+    assert following(live).status_code == 304
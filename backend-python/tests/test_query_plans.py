@@ -0,0 +1,12 @@
+from sqlmodel import SQLModel, create_engine
+
+import models  # noqa: F401
+from query_plans import HOT_QUERIES, capture, check_query_plans
+
+
+def test_hot_queries_use_an_index():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+
+    assert all(capture(engine, run) for run in HOT_QUERIES.values())
+    assert check_query_plans(engine) == {}
@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from refresher import StreamerRefresher
+
+
+def streamer(login: str, popularity: int, age: float | None) -> SimpleNamespace:
+    now = datetime(2026, 1, 1)
+    refreshed_at = None if age is None else now - timedelta(seconds=age)
+    return SimpleNamespace(
+        id=login, provider="twitch", login=login, provider_id=None, popularity=popularity, refreshed_at=refreshed_at
+    )
+
+
+def test_refresh_age_shrinks_with_popularity():
+    refresher = StreamerRefresher({"twitch": None}, min_age=900, hot_age=120)
+    candidates = [
+        streamer("niche", 1, 600),
+        streamer("known", 4, 600),
+        streamer("hot", 400, 150),
+        streamer("just-done", 400, 60),
+        streamer("new", 1, None),
+    ]
+
+    plan = refresher.plan(candidates, datetime(2026, 1, 1))
+
+    # niche waits 900s, known 450s, hot ones 120s; never-refreshed rows always qualify.
+    assert [r.login for r in plan["twitch"]] == ["new", "hot", "known"]
+    assert refresher.max_age(1) == timedelta(seconds=900)
+    assert refresher.max_age(10_000) == timedelta(seconds=120)
+
+
+def test_failed_refresh_marks_metadata_stale_until_it_succeeds():
+    outage = True
+
+    async def fetch(streamers):
+        if outage:
+            raise OSError("twitch down")
+        return []
+
+    refresher = StreamerRefresher({"twitch": fetch})
+    rows = [streamer("a", 1, None), streamer("b", 1, None)]
+
+    asyncio.run(refresher._fetch_batch("twitch", rows))
+    assert refresher.stale("twitch", "a") and refresher.stale("twitch", "b")
+    assert refresher.generation == 1
+
+    outage = False
+    asyncio.run(refresher._fetch_batch("twitch", rows[:1]))
+    assert not refresher.stale("twitch", "a") and refresher.stale("twitch", "b")
+    assert refresher.generation == 2
@@ -0,0 +1,20 @@
+from uuid import uuid4
+
+import pytest
+
+from pagination import InvalidCursor, encode_cursor
+from rewards import decode_cursor
+
+
+@pytest.mark.parametrize("sort", ["amount", "-amount"])
+def test_amount_cursor_must_carry_a_number(sort):
+    reward_id = uuid4()
+    assert decode_cursor(encode_cursor([sort, 5, reward_id.hex]), sort) == (5.0, reward_id)
+    for value in ({"a": 1}, [1], None, "five"):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(encode_cursor([sort, value, reward_id.hex]), sort)
+
+
+def test_created_cursor_must_carry_a_timestamp():
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor(["created", {"a": 1}, uuid4().hex]), "created")
@@ -0,0 +1,59 @@
+import asyncio
+
+import httpx
+
+from app_token import AppTokenManager
+from http_clients import ProviderClients
+from singleflight import SingleFlight
+
+
+def test_calls_share_only_when_key_and_fetcher_match():
+    flights = SingleFlight()
+    calls = []
+
+    async def profile(token):
+        calls.append("profile")
+        await asyncio.sleep(0.01)
+        return {"login": "me"}
+
+    async def payload(token):
+        calls.append("payload")
+        await asyncio.sleep(0.01)
+        return {"data": [{"login": "me"}]}
+
+    async def concurrently():
+        key = ("twitch", "/users", "token", ())
+        return await asyncio.gather(
+            flights.do(key, profile, "token"),
+            flights.do(key, payload, "token"),
+            flights.do(key, profile, "token"),
+        )
+
+    first, raw, second = asyncio.run(concurrently())
+
+    assert first == second == {"login": "me"}
+    assert raw == {"data": [{"login": "me"}]}
+    assert sorted(calls) == ["payload", "profile"]
+    assert flights.stats() == {"calls": 2, "shared": 1, "inflight": 0}
+
+
+def test_app_token_fetches_share_one_request_and_never_reuse_a_finished_one():
+    posts = []
+
+    async def token_endpoint(request: httpx.Request) -> httpx.Response:
+        posts.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"access_token": f"t{len(posts)}", "expires_in": 3600})
+
+    clients = ProviderClients(transport=httpx.MockTransport(token_endpoint))
+    tokens = AppTokenManager(clients, "twitch", "https://id.test/token", "id", "secret")
+
+    async def fetch_twice():
+        first = await asyncio.gather(tokens.fetch(), tokens.fetch(), tokens.fetch())
+        return first, await tokens.fetch()
+
+    first, again = asyncio.run(fetch_twice())
+
+    assert first == ["t1", "t1", "t1"]
+    assert again == "t2"
+    assert len(posts) == 2
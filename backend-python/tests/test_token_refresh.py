@@ -0,0 +1,66 @@
+import asyncio
+
+from db import read
+from store import get_token, upsert_token, upsert_user
+from token_refresh import TokenRefreshError, TokenRefreshScheduler
+from write_queue import write
+
+
+def login(user_id: int, refresh_token: str) -> None:
+    # expires_in below the scheduler margin, so the token is due right away.
+    token_data = {"access_token": f"at-{refresh_token}", "refresh_token": refresh_token, "expires_in": 10}
+    write(upsert_token, user_id, "twitch", token_data)
+
+
+def relogin_during(result):
+    """Provider exchange that lets the user log in again before it answers."""
+
+    async def exchange(refresh_token: str):
+        login(exchange.user_id, "from-login")
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return exchange
+
+
+def test_refresh_result_does_not_overwrite_a_newer_login():
+    user_id = write(upsert_user, "twitch", "cas-refresh", {"display_name": "cas"})
+    login(user_id, "old")
+    exchange = relogin_during({"access_token": "at-refreshed", "refresh_token": "refreshed", "expires_in": 3600})
+    exchange.user_id = user_id
+    scheduler = TokenRefreshScheduler({"twitch": exchange})
+
+    asyncio.run(scheduler.refresh(user_id, "twitch"))
+
+    assert read(get_token, user_id, "twitch").refresh_token == "from-login"
+    assert scheduler.stats()["superseded"] == 1 and scheduler.stats()["refreshed"] == 0
+
+
+def test_rejected_grant_does_not_clear_a_newer_refresh_token():
+    user_id = write(upsert_user, "twitch", "cas-revoke", {"display_name": "cas"})
+    login(user_id, "old")
+    exchange = relogin_during(TokenRefreshError("twitch", 400, "invalid_grant"))
+    exchange.user_id = user_id
+    scheduler = TokenRefreshScheduler({"twitch": exchange})
+
+    asyncio.run(scheduler.refresh(user_id, "twitch"))
+
+    assert read(get_token, user_id, "twitch").refresh_token == "from-login"
+    assert scheduler.stats()["superseded"] == 1 and scheduler.stats()["revoked"] == 0
+
+
+def test_refresh_replaces_the_token_it_read():
+    user_id = write(upsert_user, "twitch", "cas-ok", {"display_name": "cas"})
+    login(user_id, "old")
+
+    async def exchange(refresh_token: str):
+        assert refresh_token == "old"
+        return {"access_token": "at-new", "expires_in": 3600}
+
+    scheduler = TokenRefreshScheduler({"twitch": exchange})
+    asyncio.run(scheduler.refresh(user_id, "twitch"))
+
+    token = read(get_token, user_id, "twitch")
+    assert (token.access_token, token.refresh_token) == ("at-new", "old")
+    assert scheduler.stats()["refreshed"] == 1
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import httpx
+
+from http_clients import ProviderClients
+from rate_limit import ProviderLimits, RateLimiter
+from twitch_sync import HELIX_BATCH, HelixClient, TwitchFollowSync
+
+FOLLOWS = 250
+
+
+class MockHelix:
+    """Local Helix stand-in: `channels/followed` pages by cursor, `users` echoes the requested ids."""
+
+    def __init__(self):
+        self.requests = []
+        self.responses = {}
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        queued = self.responses.get(request.url.path)
+        if queued:
+            return queued.pop(0)
+        if request.url.path.endswith("/channels/followed"):
+            start = int(request.url.params.get("after") or 0)
+            end = min(start + int(request.url.params["first"]), FOLLOWS)
+            data = [
+                {"broadcaster_id": str(i), "broadcaster_login": f"s{i}", "broadcaster_name": f"S{i}"}
+                for i in range(start, end)
+            ]
+            pagination = {"cursor": str(end)} if end < FOLLOWS else {}
+            return httpx.Response(200, json={"data": data, "pagination": pagination})
+        if request.url.path.endswith("/users"):
+            ids = request.url.params.get_list("id")
+            return httpx.Response(200, json={"data": [{"id": i, "login": f"s{i}", "profile_image_url": i} for i in ids]})
+        return httpx.Response(404)
+
+    def paths(self, suffix: str):
+        return [r for r in self.requests if r.url.path.endswith(suffix)]
+
+
+def helix_client(mock: MockHelix, limiter: RateLimiter | None = None) -> HelixClient:
+    clients = ProviderClients(limiter=limiter, transport=httpx.MockTransport(mock))
+    return HelixClient(clients, "client-id", base_url="https://helix.test/helix")
+
+
+def test_fetch_follows_pages_by_cursor_and_batches_user_lookups():
+    mock = MockHelix()
+    entries = asyncio.run(TwitchFollowSync(helix_client(mock)).fetch_follows("42", "user-token"))
+
+    assert len(entries) == FOLLOWS
+    assert entries[7] == {"provider_id": "7", "login": "s7", "display_name": "S7", "avatar": "7"}
+    pages = mock.paths("/channels/followed")
+    assert [p.url.params.get("after") for p in pages] == [None, "100", "200"]
+    assert all(p.url.params["user_id"] == "42" for p in pages)
+    lookups = [r.url.params.get_list("id") for r in mock.paths("/users")]
+    assert all(len(ids) <= HELIX_BATCH for ids in lookups)
+    assert sorted(int(i) for ids in lookups for i in ids) == list(range(FOLLOWS))
+    assert all(r.headers["Authorization"] == "Bearer user-token" for r in mock.requests)
+
+
+def test_ratelimit_headers_pause_the_token_bucket():
+    mock = MockHelix()
+    reset = time.time() + 0.3
+    # Twitch reports the reset as an epoch timestamp; nothing left beyond the reserve.
+    mock.responses["/helix/users"] = [
+        httpx.Response(
+            200,
+            json={"data": []},
+            headers={"Ratelimit-Limit": "800", "Ratelimit-Remaining": "1", "Ratelimit-Reset": str(reset)},
+        )
+    ]
+    limiter = RateLimiter({"twitch": ProviderLimits(capacity=800, window=60, reserve=5)})
+    helix = helix_client(mock, limiter)
+
+    async def two_calls():
+        await helix.get("/users", "t", [("id", "1")])
+        await helix.get("/users", "t", [("id", "2")])
+
+    asyncio.run(two_calls())
+
+    assert len(mock.requests) == 2
+    assert time.time() >= reset - 0.05
+    assert limiter.stats()["providers"]["twitch"]["wait"]["interactive"]["maxWaitMs"] >= 200
+
+
+def test_429_waits_for_reset_and_retries():
+    mock = MockHelix()
+    mock.responses["/helix/users"] = [httpx.Response(429, headers={"Ratelimit-Reset": str(time.time() + 0.2)})]
+    limiter = RateLimiter({"twitch": ProviderLimits(capacity=800, window=60)})
+    helix = helix_client(mock, limiter)
+
+    started = time.monotonic()
+    payload = asyncio.run(helix.get("/users", "t", [("id", "9")]))
+
+    assert payload["data"][0]["id"] == "9"
+    assert len(mock.requests) == 2
+    assert time.monotonic() - started >= 0.15
+    assert limiter.stats()["providers"]["twitch"]["throttled"] == 1
@@ -0,0 +1,164 @@
+import asyncio
+import heapq
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+
+from db import read_async
+from singleflight import SingleFlight
+from store import clear_refresh_token, get_token, replace_token, tokens_expiring
+from write_queue import write_async
+
+# provider -> coroutine exchanging a refresh token for a new token payload.
+Refresher = Callable[[str], Awaitable[Dict]]
+
+TOKEN_REFRESH_MARGIN = float(os.environ.get("TOKEN_REFRESH_MARGIN", "300"))
+TOKEN_REFRESH_CONCURRENCY = int(os.environ.get("TOKEN_REFRESH_CONCURRENCY", "8"))
+TOKEN_REFRESH_SCAN_INTERVAL = float(os.environ.get("TOKEN_REFRESH_SCAN_INTERVAL", "300"))
+TOKEN_REFRESH_RETRY = float(os.environ.get("TOKEN_REFRESH_RETRY", "60"))
+
+
+class TokenRefreshError(Exception):
+    def __init__(self, provider: str, status_code: int, detail: str):
+        super().__init__(f"{provider} token refresh {status_code}: {detail}")
+        # 400/401 mean the refresh token itself was rejected; retrying will not help.
+        self.permanent = status_code in (400, 401)
+
+
+class TokenRefreshScheduler:
+    """Refreshes stored OAuth tokens shortly before `AuthToken.expires_at`.
+
+    Due times (`expires_at - margin`) sit in a min-heap; superseded entries are
+    skipped lazily. The loop sleeps until the earliest due time, a new
+    `schedule()` call or the next DB scan (which picks up tokens issued by
+    other workers or before a restart), then refreshes everything due, at
+    most `concurrency` at a time. `refresh()` is single-flight per
+    (user, provider) within this scheduler. Logins and other workers are not
+    coordinated with it, so results are written compare-and-swap on the
+    refresh token that was read: if the row changed meanwhile, the newer
+    token wins and this result (or rejection) is dropped.
+    """
+
+    def __init__(
+        self,
+        refreshers: Dict[str, Refresher],
+        margin: float = TOKEN_REFRESH_MARGIN,
+        concurrency: int = TOKEN_REFRESH_CONCURRENCY,
+        scan_interval: float = TOKEN_REFRESH_SCAN_INTERVAL,
+        retry_delay: float = TOKEN_REFRESH_RETRY,
+    ):
+        self.refreshers = refreshers
+        self.margin = timedelta(seconds=margin)
+        self.scan_interval = scan_interval
+        self.retry_delay = timedelta(seconds=retry_delay)
+        self._sem = asyncio.Semaphore(concurrency)
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._due: Dict[Tuple[int, str], datetime] = {}
+        self._flights = SingleFlight()
+        self._wakeup = asyncio.Event()
+        self.refreshed = 0
+        self.failed = 0
+        self.revoked = 0
+        self.superseded = 0
+
+    def schedule(self, user_id: int, provider: str, expires_at: datetime | None) -> None:
+        if expires_at is None or provider not in self.refreshers:
+            return
+        self._push(user_id, provider, expires_at - self.margin)
+
+    def track(self, user_id: int, provider: str, token_data: Dict) -> None:
+        """Schedule a freshly issued token from its `expires_in`."""
+        expires_in = token_data.get("expires_in")
+        if expires_in and token_data.get("refresh_token"):
+            self.schedule(user_id, provider, datetime.utcnow() + timedelta(seconds=expires_in))
+
+    def _push(self, user_id: int, provider: str, due: datetime) -> None:
+        self._due[(user_id, provider)] = due
+        heapq.heappush(self._heap, (due, user_id, provider))
+        self._wakeup.set()
+
+    async def refresh(self, user_id: int, provider: str) -> None:
+        await self._flights.do((user_id, provider), self._refresh, user_id, provider)
+
+    async def _refresh(self, user_id: int, provider: str) -> None:
+        async with self._sem:
+            token = await read_async(get_token, user_id, provider)
+            if token is None or not token.refresh_token:
+                return
+            if token.expires_at and token.expires_at - self.margin > datetime.utcnow():
+                # Replaced since it was scheduled (e.g. the user logged in again).
+                self.schedule(user_id, provider, token.expires_at)
+                return
+            try:
+                token_data = await self.refreshers[provider](token.refresh_token)
+            except TokenRefreshError as exc:
+                self.failed += 1
+                if exc.permanent:
+                    if await write_async(clear_refresh_token, user_id, provider, token.refresh_token):
+                        self.revoked += 1
+                    else:
+                        self.superseded += 1
+                else:
+                    self._push(user_id, provider, datetime.utcnow() + self.retry_delay)
+                return
+            except httpx.HTTPError:
+                self.failed += 1
+                self._push(user_id, provider, datetime.utcnow() + self.retry_delay)
+                return
+            # Providers may keep the refresh token and omit it from the response.
+            token_data.setdefault("refresh_token", token.refresh_token)
+            if not await write_async(replace_token, user_id, provider, token.refresh_token, token_data):
+                # Someone stored a newer token while this exchange was in flight; keep theirs.
+                self.superseded += 1
+                return
+            self.refreshed += 1
+            self.track(user_id, provider, token_data)
+
+    async def _scan(self) -> None:
+        horizon = datetime.utcnow() + self.margin + timedelta(seconds=self.scan_interval)
+        for row in await read_async(tokens_expiring, horizon):
+            if (row.user_id, row.provider) not in self._due:
+                self.schedule(row.user_id, row.provider, row.expires_at)
+
+    def _pop_due(self, now: datetime) -> List[Tuple[int, str]]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, user_id, provider = heapq.heappop(self._heap)
+            if self._due.get((user_id, provider)) == when:
+                del self._due[(user_id, provider)]
+                due.append((user_id, provider))
+        return due
+
+    async def run(self) -> None:
+        next_scan = 0.0
+        while True:
+            if time.monotonic() >= next_scan:
+                try:
+                    await self._scan()
+                except Exception:
+                    self.failed += 1
+                next_scan = time.monotonic() + self.scan_interval
+            due = self._pop_due(datetime.utcnow())
+            if due:
+                await asyncio.gather(*(self.refresh(*key) for key in due), return_exceptions=True)
+            timeout = next_scan - time.monotonic()
+            if self._heap:
+                timeout = min(timeout, (self._heap[0][0] - datetime.utcnow()).total_seconds())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "scheduled": len(self._due),
+            "inflight": self._flights.stats()["inflight"],
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "revoked": self.revoked,
+            "superseded": self.superseded,
+        }
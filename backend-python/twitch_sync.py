@@ -0,0 +1,229 @@
+import asyncio
+import os
+from typing import Dict, List, Optional
+
+from app_token import AppTokenManager
+from batch_loader import BatchLoader, scoped_loader
+from http_clients import ProviderClients
+from singleflight import SingleFlight
+
+TWITCH_HELIX_URL = os.environ.get("TWITCH_HELIX_URL", "https://api.twitch.tv/helix")
+TWITCH_SYNC_CONCURRENCY = int(os.environ.get("TWITCH_SYNC_CONCURRENCY", "4"))
+HELIX_BATCH = 100
+
+
+class HelixError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"Helix {status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+    @property
+    def invalid_token(self) -> bool:
+        # Helix answers 401 "Invalid OAuth token" for a bad token; other 401s (wrong token type,
+        # missing scope) would fail the same way with a fresh token.
+        detail = self.detail.lower()
+        return self.status_code == 401 and "invalid" in detail and "token" in detail
+
+
+class HelixClient:
+    def __init__(
+        self,
+        clients: ProviderClients,
+        client_id: str,
+        app_tokens: Optional[AppTokenManager] = None,
+        base_url: str = TWITCH_HELIX_URL,
+        max_retries: int = 2,
+        flights: Optional[SingleFlight] = None,
+    ):
+        self.clients = clients
+        self.client_id = client_id
+        self.app_tokens = app_tokens
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.flights = flights
+
+    async def get(self, path: str, token: Optional[str], params: List[tuple]) -> Dict:
+        """GET a Helix endpoint with a user token, or with the app token when `token` is None.
+
+        Identical concurrent calls (same path, credential and params) share one request.
+        """
+        if self.flights is None:
+            return await self._fetch(path, token, params)
+        return await self.flights.do(("twitch", path, token, tuple(params)), self._fetch, path, token, params)
+
+    async def _fetch(self, path: str, token: Optional[str], params: List[tuple]) -> Dict:
+        if token is not None:
+            return await self._get(path, token, params)
+        if self.app_tokens is None:
+            raise HelixError(401, "no app token configured")
+        app_token = await self.app_tokens.get()
+        try:
+            return await self._get(path, app_token, params)
+        except HelixError as exc:
+            if not exc.invalid_token:
+                raise
+            # Revoked or expired early: drop it, fetch a new one and retry once.
+            self.app_tokens.invalidate(app_token)
+            return await self._get(path, await self.app_tokens.get(), params)
+
+    async def _get(self, path: str, token: str, params: List[tuple]) -> Dict:
+        headers = {"Authorization": f"Bearer {token}", "Client-Id": self.client_id}
+        for attempt in range(self.max_retries + 1):
+            resp = await self.clients.get("twitch").get(f"{self.base_url}{path}", params=params, headers=headers)
+            if resp.status_code == 429 and attempt < self.max_retries:
+                # The rate limiter has paused this token's bucket until the reset.
+                continue
+            if resp.status_code != 200:
+                raise HelixError(resp.status_code, resp.text[:200])
+            return resp.json()
+        raise HelixError(429, "rate limited")
+
+
+class TwitchFollowSync:
+    """Builds a user's Twitch follow list from Helix.
+
+    Pages `channels/followed` (100 per page, cursor-driven) and, while the next
+    page is in flight, resolves each page's broadcasters through `users?id=`
+    in batches of 100, at most `concurrency` lookups at a time. Per-id lookups
+    go through `BatchLoader`s, so inside a `loader_scope()` concurrent callers
+    share batches and each id is fetched once per scope.
+    """
+
+    def __init__(self, helix: HelixClient, concurrency: int = TWITCH_SYNC_CONCURRENCY):
+        self.helix = helix
+        self.concurrency = concurrency
+
+    def _users(self, key: str, token: Optional[str]) -> BatchLoader:
+        """`users` profiles by `id` or lowercased `login`, 100 per call."""
+
+        async def load(values: List[str]) -> Dict[str, Dict]:
+            payload = await self.helix.get("/users", token, [(key, v) for v in values])
+            return {u[key].lower() if key == "login" else u[key]: u for u in payload.get("data") or []}
+
+        return scoped_loader(
+            ("twitch", "users", key, token),
+            lambda: BatchLoader("twitch.users", load, HELIX_BATCH, self.concurrency),
+        )
+
+    def _followers(self, token: str) -> BatchLoader:
+        """Follower totals; Helix takes one broadcaster per call, so this only dedupes and caches.
+
+        `channels/followers` needs a user access token; app tokens are rejected.
+        """
+
+        async def load(values: List[str]) -> Dict[str, int]:
+            try:
+                payload = await self.helix.get(
+                    "/channels/followers", token, [("broadcaster_id", values[0]), ("first", "1")]
+                )
+            except HelixError:
+                return {}
+            return {values[0]: payload.get("total")}
+
+        return scoped_loader(
+            ("twitch", "followers", token),
+            lambda: BatchLoader("twitch.followers", load, 1, self.concurrency),
+        )
+
+    def _streams(self, key: str, token: Optional[str]) -> BatchLoader:
+        """Live `streams` by `user_id` or lowercased `user_login`, 100 per call."""
+
+        async def load(values: List[str]) -> Dict[str, Dict]:
+            payload = await self.helix.get(
+                "/streams", token, [(key, v) for v in values] + [("first", str(HELIX_BATCH))]
+            )
+            return {s[key].lower() if key == "user_login" else s[key]: s for s in payload.get("data") or []}
+
+        return scoped_loader(
+            ("twitch", "streams", key, token),
+            lambda: BatchLoader("twitch.streams", load, HELIX_BATCH, self.concurrency),
+        )
+
+    async def fetch_follows(self, twitch_user_id: str, token: str) -> List[Dict]:
+        users_by_id = self._users("id", token)
+        lookups: List[asyncio.Task] = []
+        channels: List[Dict] = []
+        cursor = None
+        try:
+            while True:
+                params = [("user_id", twitch_user_id), ("first", str(HELIX_BATCH))]
+                if cursor:
+                    params.append(("after", cursor))
+                page = await self.helix.get("/channels/followed", token, params)
+                data = page.get("data") or []
+                channels.extend(data)
+                lookups.append(asyncio.create_task(users_by_id.load_many(c["broadcaster_id"] for c in data)))
+                cursor = (page.get("pagination") or {}).get("cursor")
+                if not cursor or not data:
+                    break
+            users: Dict[str, Dict] = {}
+            for found in await asyncio.gather(*lookups):
+                users.update(found)
+        except BaseException:
+            for task in lookups:
+                task.cancel()
+            raise
+
+        entries = []
+        for c in channels:
+            info = users.get(c["broadcaster_id"], {})
+            entries.append(
+                {
+                    "provider_id": c["broadcaster_id"],
+                    "login": c.get("broadcaster_login") or info.get("login") or c["broadcaster_id"],
+                    "display_name": c.get("broadcaster_name") or info.get("display_name"),
+                    "avatar": info.get("profile_image_url"),
+                }
+            )
+        return entries
+
+    async def fetch_channels(self, token: Optional[str], streamers: List[Dict]) -> List[Dict]:
+        """Current metadata for known streamers (`login`, optional `provider_id`).
+
+        Profiles come from `users` in batches of 100 (by id, or by login when the
+        id is not known yet); follower totals need one `channels/followers` call
+        per broadcaster and a user token (`token`). Without one, `followers`
+        stays None, which keeps the stored value. Results keep the caller's
+        login so renames do not fork rows.
+        """
+        by_id = {s["provider_id"]: s["login"] for s in streamers if s.get("provider_id")}
+        by_login = {s["login"].lower(): s["login"] for s in streamers if not s.get("provider_id")}
+        found_by_id, found_by_login = await asyncio.gather(
+            self._users("id", token).load_many(by_id), self._users("login", token).load_many(by_login)
+        )
+        users: Dict[str, Dict] = {**found_by_id, **{u["id"]: u for u in found_by_login.values()}}
+        totals = await self._followers(token).load_many(users) if token else {}
+
+        entries = []
+        for uid, info in users.items():
+            login = by_id.get(uid) or by_login.get((info.get("login") or "").lower())
+            if not login:
+                continue
+            entries.append(
+                {
+                    "login": login,
+                    "provider_id": uid,
+                    "display_name": info.get("display_name"),
+                    "followers": totals.get(uid),
+                    "avatar": info.get("profile_image_url"),
+                }
+            )
+        return entries
+
+    async def fetch_streams(self, token: Optional[str], streamers: List[Dict]) -> Dict[str, Dict]:
+        """Live streams among `streamers`, keyed by their stored login (100 per call)."""
+        by_id = {s["provider_id"]: s["login"] for s in streamers if s.get("provider_id")}
+        by_login = {s["login"].lower(): s["login"] for s in streamers if not s.get("provider_id")}
+        found_by_id, found_by_login = await asyncio.gather(
+            self._streams("user_id", token).load_many(by_id), self._streams("user_login", token).load_many(by_login)
+        )
+        live: Dict[str, Dict] = {}
+        for found, logins in ((found_by_id, by_id), (found_by_login, by_login)):
+            for key, stream in found.items():
+                live[logins[key]] = {
+                    "viewers": stream.get("viewer_count"),
+                    "title": stream.get("title"),
+                    "started_at": stream.get("started_at"),
+                }
+        return live
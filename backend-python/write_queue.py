@@ -0,0 +1,138 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+
+from sqlmodel import Session
+
+from db import run_db, write_engine
+
+T = TypeVar("T")
+Mutation = Callable[..., T]
+
+_STOP = object()
+
+
+class WriteBatcher:
+    """Group commit: one writer thread applies queued mutations in shared transactions.
+
+    A mutation is `fn(session, *args)`; it must not commit. The writer waits up
+    to `max_delay` seconds (or `max_batch` items) after the first arrival, runs
+    each mutation inside its own SAVEPOINT so one failure does not poison the
+    batch, then commits once. Every caller gets its own result or exception.
+    """
+
+    def __init__(self, max_batch: int = 64, max_delay: float = 0.005):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self.batches = 0
+        self.operations = 0
+        self.largest_batch = 0
+
+    @classmethod
+    def from_env(cls) -> "WriteBatcher":
+        return cls(
+            max_batch=int(os.environ.get("DB_WRITE_BATCH_MAX", "64")),
+            max_delay=float(os.environ.get("DB_WRITE_BATCH_DELAY_MS", "5")) / 1000,
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, fn: Mutation, *args: Any) -> "Future[T]":
+        future: "Future[T]" = Future()
+        self._queue.put((future, fn, args))
+        return future
+
+    def _collect(self, first: Tuple) -> Tuple[List[Tuple], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch, stopping = self._collect(item)
+            self._apply(batch)
+
+    def _apply(self, batch: List[Tuple]) -> None:
+        done: List[Tuple[Future, Any]] = []
+        try:
+            with Session(write_engine) as session, session.begin():
+                for future, fn, args in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with session.begin_nested():
+                            done.append((future, fn(session, *args)))
+                    except Exception as exc:
+                        future.set_exception(exc)
+        except Exception as exc:
+            for future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for future, result in done:
+                future.set_result(result)
+        self.batches += 1
+        self.operations += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "enabled": self.running,
+            "batches": self.batches,
+            "operations": self.operations,
+            "largestBatch": self.largest_batch,
+            "pending": self._queue.qsize(),
+        }
+
+
+DB_WRITE_BATCHING = os.environ.get("DB_WRITE_BATCHING", "").lower() in ("1", "true", "yes", "on")
+
+write_batcher = WriteBatcher.from_env()
+
+
+def write(fn: Mutation, *args: Any) -> T:
+    """Apply `fn(session, *args)` in a committed transaction (blocking)."""
+    if write_batcher.running:
+        return write_batcher.submit(fn, *args).result()
+    with Session(write_engine) as session, session.begin():
+        return fn(session, *args)
+
+
+async def write_async(fn: Mutation, *args: Any) -> T:
+    if write_batcher.running:
+        return await asyncio.wrap_future(write_batcher.submit(fn, *args))
+    return await run_db(write, fn, *args)
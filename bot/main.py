@@ -1,7 +1,10 @@
+import hashlib
+import hmac
 import os
 from dataclasses import dataclass, field
 from typing import Dict, List
 
+import httpx
 from dotenv import load_dotenv
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
@@ -20,6 +23,9 @@ if not BOT_TOKEN:
     raise RuntimeError("BOT_TOKEN is not set. Provide it via environment or .env file.")
 FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:8001")
 BACKEND_URL = os.environ.get("BACKEND_URL", "http://localhost:8000")
+# Same value as the API's PROFILE_LINK_SECRET. Without it /profile accepts a bare user_id,
+# which lets any Telegram user bind (and read) any backend profile.
+PROFILE_LINK_SECRET = os.environ.get("PROFILE_LINK_SECRET")
 
 
 @dataclass
@@ -54,12 +60,55 @@ def _https_or_none(url: str | None) -> str | None:
     return None
 
 
+def parse_link_code(code: str) -> int | None:
+    """backend user_id from the `link_code` of the OAuth redirect (`<user_id>.<hmac>`), None if the code is invalid."""
+    if not PROFILE_LINK_SECRET:
+        return int(code) if code.isdigit() else None
+    user_id, _, signature = code.partition(".")
+    if not user_id.isdigit():
+        return None
+    expected = hmac.new(PROFILE_LINK_SECRET.encode(), user_id.encode(), hashlib.sha256).hexdigest()[:32]
+    return int(user_id) if hmac.compare_digest(signature, expected) else None
+
+
 def get_profile(user_id: int, username: str | None) -> Profile:
     if user_id not in profiles:
         profiles[user_id] = Profile(username=username or f"user_{user_id}")
     return profiles[user_id]
 
 
+async def fetch_backend_profile(backend_user_id: int) -> Dict | None:
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            resp = await client.get(f"{BACKEND_URL}/me", params={"user_id": backend_user_id})
+    except httpx.HTTPError:
+        return None
+    if resp.status_code != 200:
+        return None
+    data = resp.json()
+    return data if data.get("userId") else None
+
+
+def apply_backend_profile(profile: Profile, me: Dict) -> None:
+    if (me.get("twitch") or {}).get("linked"):
+        name = me.get("displayName") or "twitch_user"
+        profile.twitch_username = name
+        profile.twitch_handle = f"@{name}"
+    profile.steam_trade_url = me.get("steamTradeLink")
+    profile.participation_active = bool(me.get("participationActive"))
+    follows = me.get("follows") or []
+    profile.followed_streamers = [f.get("display_name") or f.get("login") for f in follows]
+    profile.streamers_followers = {
+        f.get("display_name") or f.get("login"): f.get("followers") or 0 for f in follows
+    }
+    stats = me.get("stats") or {}
+    profile.stats = Stats(
+        total_prizes=stats.get("totalPrizes", 0),
+        total_amount_usd=stats.get("totalAmountUsd", 0.0),
+        monthly_prizes=stats.get("monthlyPrizes", 0),
+    )
+
+
 def action_keyboard() -> InlineKeyboardMarkup | None:
     open_url = _https_or_none(FRONTEND_URL)
     kick_url = _https_or_none(f"{BACKEND_URL}/auth/kick/start")
@@ -150,6 +199,18 @@ async def send_profile(update: Update, context: ContextTypes.DEFAULT_TYPE, profi
 async def show_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user = update.effective_user
     profile = get_profile(user.id, user.username)
+    # /profile <link_code> links the chat to a backend user (the link_code from the web redirect).
+    if context.args:
+        backend_user_id = parse_link_code(context.args[0])
+        if backend_user_id is None:
+            await update.message.reply_text("Использование: /profile <link_code> (код из ссылки после входа)")
+            return
+        context.user_data["backend_user_id"] = backend_user_id
+    backend_user_id = context.user_data.get("backend_user_id")
+    if backend_user_id:
+        me = await fetch_backend_profile(backend_user_id)
+        if me:
+            apply_backend_profile(profile, me)
     await send_profile(update, context, profile)
 
 